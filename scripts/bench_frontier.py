@@ -0,0 +1,77 @@
+"""Measure CrawlFrontier throughput and memory per million enqueued URLs.
+
+    python scripts/bench_frontier.py --urls 1000000
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.frontier import CrawlFrontier
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--urls', type=int, default=1_000_000)
+    parser.add_argument('--batch', type=int, default=10_000)
+    parser.add_argument('--error-rate', type=float, default=0.001)
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='also trace Python heap allocations (slows enqueueing several times)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'frontier.db')
+        frontier = CrawlFrontier(db_path, capacity=args.urls, error_rate=args.error_rate)
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if args.tracemalloc:
+            tracemalloc.start()
+        started = time.time()
+        for start in range(0, args.urls, args.batch):
+            frontier.push_many(
+                (f'https://example.com/section-{i % 997}/page-{i}', i % 7, (i * 31 % 1000) / 1000)
+                for i in range(start, min(start + args.batch, args.urls))
+            )
+        push_elapsed = time.time() - started
+        if args.tracemalloc:
+            _, peak_python = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        rss_growth = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) * 1024
+
+        duplicates = sum(frontier.push(f'https://example.com/section-{i % 997}/page-{i}') for i in range(10_000))
+        false_positives = sum(not frontier.push(f'https://other.example/{i}') for i in range(10_000))
+
+        started = time.time()
+        popped = 0
+        while popped < min(args.urls, 100_000):
+            batch = frontier.pop(1000)
+            frontier.done(*(url for url, _, _ in batch))
+            popped += len(batch)
+        pop_elapsed = time.time() - started
+
+        stats = frontier.memory_stats()
+        frontier.close()
+
+        rss_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        per_million = 1_000_000 / args.urls
+        print(f"enqueued {args.urls} URLs in {push_elapsed:.1f}s ({args.urls / push_elapsed:,.0f} URLs/s)")
+        print(f"popped and acknowledged {popped} URLs in {pop_elapsed:.1f}s ({popped / pop_elapsed:,.0f} URLs/s)")
+        print(f"re-pushed duplicates accepted: {duplicates} / 10000")
+        print(f"false positive rate on unseen URLs: {false_positives / 10_000:.4%}")
+        print(f"bloom filter: {stats['bloom_bytes'] / 2**20:.2f} MiB "
+              f"({stats['bloom_bytes_per_million_urls'] / 2**20:.2f} MiB per million URLs)")
+        print(f"RSS growth while enqueuing: {rss_growth / 2**20:.2f} MiB "
+              f"({rss_growth * per_million / 2**20:.2f} MiB per million URLs)")
+        if args.tracemalloc:
+            print(f"peak Python heap while enqueuing: {peak_python / 2**20:.2f} MiB "
+                  f"({peak_python * per_million / 2**20:.2f} MiB per million URLs)")
+        print(f"max RSS: {rss_mib:.1f} MiB, database on disk: {os.path.getsize(db_path) / 2**20:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Measure memory of compact Link records against the old per-link dicts.
+
+Builds a large synthetic site, extracts its links with EnhancedLLMSGenerator,
+then uses tracemalloc to compare holding them as Link records versus the
+``{'text', 'url', 'context'}`` dicts used previously, and times JSON encoding.
+
+    python scripts/bench_link_memory.py --links 200000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.routes.enhanced_llms_generator import EnhancedLLMSGenerator
+from src.utils.links import Link, json_default
+
+SECTIONS = ['docs', 'api', 'blog', 'products', 'support', 'company', 'guides', 'reference']
+
+
+def synthetic_site(count):
+    parts = ['<html><head><title>Synthetic</title></head><body>']
+    for i in range(0, count, 10):
+        section = SECTIONS[(i // 10) % len(SECTIONS)]
+        parts.append(f'<div class="group"><p>Links for the {section} area, group {i // 10}</p><ul>')
+        for j in range(i, min(i + 10, count)):
+            parts.append(f'<li><a href="/{section}/topic-{j // 100}/page-{j}?utm_source=x">Page {j} of {section}</a></li>')
+        parts.append('</ul></div>')
+    parts.append('</body></html>')
+    return ''.join(parts).encode('utf-8')
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def best_of(runs, fn):
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--links', type=int, default=200_000)
+    args = parser.parse_args()
+
+    html = synthetic_site(args.links)
+    generator = EnhancedLLMSGenerator('https://example.com/')
+    started = time.perf_counter()
+    generator.analyze_website_advanced(html)
+    elapsed = time.perf_counter() - started
+    raw = [(link.text, link.url, link.context) for link in generator.site_data['raw_links']]
+    print(f"extracted and categorized {len(raw):,} links in {elapsed:.2f}s")
+    del generator
+
+    # Rebuild both representations from fresh string copies, as extraction
+    # would, so neither side benefits from sharing the other's strings.
+    def fresh():
+        for text, url, context in raw:
+            yield ''.join(text), ''.join(url), ''.join(context)
+
+    links, link_bytes = measure(lambda: [Link(t, u, c) for t, u, c in fresh()])
+    dicts, dict_bytes = measure(lambda: [{'text': t, 'url': u, 'context': c} for t, u, c in fresh()])
+
+    per = 1_000_000 / len(raw)
+    print(f"dicts: {dict_bytes / 2**20:8.2f} MiB ({dict_bytes * per / 2**20:8.1f} MiB per million links)")
+    print(f"Link:  {link_bytes / 2**20:8.2f} MiB ({link_bytes * per / 2**20:8.1f} MiB per million links)")
+    print(f"saved: {(1 - link_bytes / dict_bytes):.0%}")
+
+    dict_json, dict_elapsed = best_of(3, lambda: json.dumps(dicts))
+    link_json, link_elapsed = best_of(3, lambda: json.dumps(links, default=json_default))
+    assert dict_json == link_json
+    print(f"json.dumps dicts {dict_elapsed:.3f}s, Link {link_elapsed:.3f}s (best of 3)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Benchmark parse throughput with and without the process pool.
+
+Simulates a gthread worker: a fixed number of request threads analyze large
+synthetic pages back to back, once parsing in the request threads (pool size
+0) and then offloading to ParsePool with increasing pool sizes. Alongside, a
+"cheap request" thread repeatedly does about a millisecond of pure-Python
+work and records how long it takes, which shows how much the parses hold the
+GIL against unrelated requests.
+
+    python scripts/bench_parse_pool.py --threads 8 --pools 0,1,2,4,8
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.routes.llms_generator import LLMSGenerator  # noqa: E402
+from src.routes.enhanced_llms_generator import EnhancedLLMSGenerator  # noqa: E402
+from src.utils.parse_pool import ParsePool, run_local  # noqa: E402
+
+MODES = {
+    'basic': (LLMSGenerator, 'analyze_website'),
+    'advanced': (EnhancedLLMSGenerator, 'analyze_website_advanced'),
+}
+
+
+def make_page(links, paragraphs):
+    items = ''.join(
+        f'<li><a href="/docs/section{i % 40}/page{i}">Documentation page {i}</a> '
+        f'<span>short summary of page {i}</span></li>'
+        for i in range(links)
+    )
+    text = ''.join(f'<p>Paragraph {i} describing the product in some detail. It has two sentences.</p>'
+                   for i in range(paragraphs))
+    return (
+        '<html><head><title>Benchmark Site</title>'
+        '<meta name="description" content="Synthetic page used to benchmark the parse pool.">'
+        '</head><body><nav><a href="/">Home</a><a href="/about">About</a><a href="/pricing">Pricing</a></nav>'
+        f'<main>{text}<ul>{items}</ul></main></body></html>'
+    ).encode('utf-8')
+
+
+def cheap_work():
+    total = 0
+    for i in range(20000):
+        total += i * i
+    return total
+
+
+def run(pool_size, args, page):
+    cls, method = MODES[args.mode]
+    pool = ParsePool(pool_size)
+    if pool_size:
+        # Start the workers and import the generators before timing
+        for _ in range(pool_size * 2):
+            pool.analyze(cls('https://bench.example/'), method, page)
+
+    stop = threading.Event()
+    completed = [0]
+    lock = threading.Lock()
+    cheap_latencies = []
+
+    def request_thread():
+        while not stop.is_set():
+            generator = cls('https://bench.example/')
+            if pool_size:
+                pool.analyze(generator, method, page)
+            else:
+                run_local(generator, method, page)
+            with lock:
+                completed[0] += 1
+
+    def cheap_thread():
+        while not stop.is_set():
+            started = time.perf_counter()
+            cheap_work()
+            cheap_latencies.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=request_thread) for _ in range(args.threads)]
+    threads.append(threading.Thread(target=cheap_thread))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    pool.shutdown()
+
+    cheap_latencies.sort()
+    return {
+        'pages_per_s': completed[0] / elapsed,
+        'cheap_p50_ms': statistics.median(cheap_latencies) * 1000,
+        'cheap_p95_ms': cheap_latencies[int(len(cheap_latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=sorted(MODES), default='advanced')
+    parser.add_argument('--threads', type=int, default=8, help='request threads (gthread --threads)')
+    parser.add_argument('--pools', default=None,
+                        help='comma-separated pool sizes; 0 parses in the request threads '
+                             '(default: 0 and powers of two up to the CPU count)')
+    parser.add_argument('--links', type=int, default=1500, help='links per synthetic page')
+    parser.add_argument('--paragraphs', type=int, default=300, help='paragraphs per synthetic page')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per pool size')
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    if args.pools:
+        pools = [int(size) for size in args.pools.split(',')]
+    else:
+        pools = [0] + [2 ** i for i in range(cpus.bit_length()) if 2 ** i <= cpus]
+    page = make_page(args.links, args.paragraphs)
+
+    # The generators print progress notes; keep them (and the pool workers,
+    # which inherit this stdout) out of the report
+    report = os.fdopen(os.dup(1), 'w')
+    os.dup2(os.open(os.devnull, os.O_WRONLY), 1)
+    print(f"{args.mode} analysis, {len(page) / 1024:.0f} KiB page, {args.threads} request threads, {cpus} CPUs",
+          file=report, flush=True)
+
+    baseline = None
+    for size in pools:
+        result = run(size, args, page)
+        baseline = baseline or result['pages_per_s']
+        label = 'in-thread' if size == 0 else f'pool x{size}'
+        print(f"{label:>10}  {result['pages_per_s']:>7.2f} pages/s  ({result['pages_per_s'] / baseline:>4.2f}x)  "
+              f"cheap request p50 {result['cheap_p50_ms']:>6.1f}ms  p95 {result['cheap_p95_ms']:>6.1f}ms",
+              file=report, flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Measure canonicalize_url throughput on cold (unique) and warm (cached) URLs.
+
+    python scripts/bench_url_canon.py --urls 2000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.url_canon import canonicalize_url, canonical_host
+
+VARIANTS = [
+    'https://www.example.com/docs/{i}/',
+    'HTTPS://Example.com:443/docs/{i}#section',
+    'https://example.com/blog/{i}?utm_source=news&utm_medium=email&page=2',
+    'http://example.com:80/a/./b/../guide/{i}?b=2&a=1',
+    'https://example.com/%7eteam/{i}?fbclid=abc',
+]
+
+
+def run(label, urls, fn):
+    started = time.perf_counter()
+    for url in urls:
+        fn(url)
+    elapsed = time.perf_counter() - started
+    print(f"{label:32} {len(urls):>10,} URLs {elapsed:7.2f}s {len(urls) / elapsed:>12,.0f} URLs/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--urls', type=int, default=1_000_000)
+    parser.add_argument('--distinct', type=int, default=20_000,
+                        help='distinct URLs in the warm run, like links repeated across a site')
+    args = parser.parse_args()
+
+    cold = [VARIANTS[i % len(VARIANTS)].format(i=i) for i in range(args.urls)]
+    canonicalize_url.cache_clear()
+    run('canonicalize_url (unique)', cold, canonicalize_url.__wrapped__)
+
+    rng = random.Random(0)
+    pool = [VARIANTS[i % len(VARIANTS)].format(i=i) for i in range(args.distinct)]
+    warm = [rng.choice(pool) for _ in range(args.urls)]
+    canonicalize_url.cache_clear()
+    run('canonicalize_url (repeated)', warm, canonicalize_url)
+    print(f"  {canonicalize_url.cache_info()}")
+
+    canonical_host.cache_clear()
+    run('canonical_host (repeated)', warm, canonical_host)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark the users API at scale against a throwaway SQLite database.
+
+Compares one-request-per-user creation with the bulk endpoint, then times
+paginating and streaming the full table.
+
+    python scripts/bench_users_api.py --rows 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from src.models.user import db
+from src.routes.user import user_bp
+
+
+def make_app(db_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.register_blueprint(user_bp, url_prefix='/api')
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def timed(label, count, fn):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:40} {count:>8,} rows {elapsed:7.2f}s {count / elapsed:>10,.0f} rows/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--single-rows', type=int, default=2_000,
+                        help='rows created one request at a time for comparison')
+    parser.add_argument('--batch', type=int, default=10_000, help='users per bulk request')
+    parser.add_argument('--page-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = make_app(os.path.join(tmp, 'bench.db')).test_client()
+
+        def single():
+            for i in range(args.single_rows):
+                client.post('/api/users', json={'username': f'single{i}', 'email': f'single{i}@example.com'})
+        timed('POST /api/users (one per request)', args.single_rows, single)
+
+        def bulk():
+            for start in range(0, args.rows, args.batch):
+                users = [{'username': f'user{i}', 'email': f'user{i}@example.com'}
+                         for i in range(start, min(start + args.batch, args.rows))]
+                response = client.post('/api/users/bulk', json=users)
+                assert response.status_code == 200, response.get_json()
+        timed(f'POST /api/users/bulk ({args.batch} per request)', args.rows, bulk)
+
+        def upsert():
+            users = [{'username': f'user{i}', 'email': f'renamed{i}@example.com'} for i in range(args.batch)]
+            assert client.post('/api/users/bulk', json=users).status_code == 200
+        timed('POST /api/users/bulk upsert', args.batch, upsert)
+
+        total = args.rows + args.single_rows
+
+        def paginate():
+            after, seen, etag = 0, 0, None
+            while True:
+                response = client.get(f'/api/users?after={after}&limit={args.page_size}')
+                page = response.get_json()
+                seen += len(page)
+                etag = etag or response.headers['ETag']
+                cursor = response.headers.get('X-Next-Cursor')
+                if not cursor:
+                    return seen, etag
+                after = cursor
+        seen, etag = timed(f'GET /api/users keyset pages of {args.page_size}', total, paginate)
+        assert seen == total, seen
+        not_modified = client.get(f'/api/users?limit={args.page_size}', headers={'If-None-Match': etag})
+        print(f"  first page revalidated with If-None-Match -> {not_modified.status_code}")
+
+        def export():
+            response = client.get('/api/users/export')
+            return sum(len(chunk) for chunk in response.response)
+        size = timed('GET /api/users/export (streamed)', total, export)
+        print(f"  exported {size / 2**20:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
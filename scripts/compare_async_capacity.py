@@ -0,0 +1,134 @@
+"""Compare how many slow upstream fetches each serving model can hold at once.
+
+Starts the stub site with an artificial delay, then for each serving model
+starts the app under gunicorn and fires a burst of concurrent
+/api/llms/generate requests, each for a distinct URL so no coalescing
+happens. Reports completions, wall time and the peak OS thread count of the
+server processes.
+
+    python scripts/compare_async_capacity.py --requests 2000 --delay 2
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODELS = {
+    'sync': ['-k', 'sync', 'src.main:app'],
+    'gthread': ['-k', 'gthread', '--threads', '{threads}', 'src.main:app'],
+    'async': ['-k', 'uvicorn.workers.UvicornWorker', 'src.asgi:app'],
+}
+
+
+def _thread_count(pid):
+    """Sum OS threads of a process and its direct children"""
+    pids = [pid]
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            pids += [int(p) for p in f.read().split()]
+    except OSError:
+        pass
+    total = 0
+    for p in pids:
+        try:
+            with open(f'/proc/{p}/status') as f:
+                for line in f:
+                    if line.startswith('Threads:'):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total
+
+
+def _wait_for_port(url, deadline=20):
+    end = time.time() + deadline
+    while time.time() < end:
+        try:
+            httpx.get(url, timeout=1)
+            return True
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    return False
+
+
+async def _burst(app_url, stub_url, count, timeout, pid):
+    peak_threads = 0
+    stop = asyncio.Event()
+
+    async def sample_threads():
+        nonlocal peak_threads
+        while not stop.is_set():
+            peak_threads = max(peak_threads, _thread_count(pid))
+            await asyncio.sleep(0.1)
+
+    async def one(client, i):
+        try:
+            response = await client.post(f'{app_url}/api/llms/generate', json={'url': f'{stub_url}/?i={i}'})
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    limits = httpx.Limits(max_connections=count, max_keepalive_connections=0)
+    sampler = asyncio.create_task(sample_threads())
+    started = time.time()
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        results = await asyncio.gather(*(one(client, i) for i in range(count)))
+    elapsed = time.time() - started
+    stop.set()
+    await sampler
+    return sum(results), elapsed, peak_threads
+
+
+def run_model(name, args, stub_url):
+    port = args.port
+    cmd = [sys.executable, '-m', 'gunicorn', '-b', f'127.0.0.1:{port}', '-w', str(args.workers),
+           '--timeout', str(int(args.timeout) + 30), '--backlog', '4096']
+    cmd += [part.format(threads=args.threads) for part in MODELS[name]]
+    server = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not _wait_for_port(f'http://127.0.0.1:{port}/api/llms/coalescing'):
+            print(f'{name}: server did not start')
+            return
+        ok, elapsed, threads = asyncio.run(
+            _burst(f'http://127.0.0.1:{port}', stub_url, args.requests, args.timeout, server.pid)
+        )
+        print(f'{name:8} ok={ok:5d}/{args.requests:<5d} wall={elapsed:7.2f}s '
+              f'rate={ok / elapsed:8.1f} req/s peak_threads={threads}')
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--delay', type=float, default=2.0, help='stub site response delay in seconds')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8, help='threads per gthread worker')
+    parser.add_argument('--timeout', type=float, default=60.0, help='client timeout per request')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--stub-port', type=int, default=8801)
+    parser.add_argument('--models', default='sync,gthread,async')
+    args = parser.parse_args()
+
+    stub = subprocess.Popen([sys.executable, os.path.join(ROOT, 'scripts', 'stub_site.py'),
+                             '--port', str(args.stub_port), '--delay', str(args.delay)])
+    stub_url = f'http://127.0.0.1:{args.stub_port}'
+    try:
+        _wait_for_port(stub_url)
+        for name in args.models.split(','):
+            run_model(name.strip(), args, stub_url)
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == '__main__':
+    main()
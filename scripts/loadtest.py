@@ -0,0 +1,240 @@
+"""Open-loop load test of the generator endpoints under gunicorn.
+
+Starts local stub target sites and the app under gunicorn with the requested
+worker model, then offers traffic to /api/llms/generate and
+/api/enhanced/generate-advanced at increasing request rates. Arrivals are
+scheduled independently of completions (open loop) and latency is measured
+from each request's scheduled start, so queueing inside the server is not
+hidden by a slow client. For every rate it reports throughput, p50/p95/p99
+latency and error rate, and it flags the saturation point.
+
+    python scripts/loadtest.py --workers 4 --threads 8 --rates 5,10,20,40,80
+    python scripts/loadtest.py --worker-class uvicorn --workers 2 --csv async.csv
+"""
+import argparse
+import asyncio
+import csv
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = {
+    'basic': '/api/llms/generate',
+    'advanced': '/api/enhanced/generate-advanced',
+}
+
+WORKER_CLASSES = {
+    'sync': (['-k', 'sync'], 'src.main:app'),
+    'gthread': (['-k', 'gthread'], 'src.main:app'),
+    'uvicorn': (['-k', 'uvicorn.workers.UvicornWorker'], 'src.asgi:app'),
+}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return float('nan')
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def wait_for(url, deadline=30):
+    end = time.time() + deadline
+    while time.time() < end:
+        try:
+            httpx.get(url, timeout=1)
+            return True
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    return False
+
+
+def start_stubs(count, base_port, delay):
+    stubs = []
+    for i in range(count):
+        stubs.append(subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, 'scripts', 'stub_site.py'),
+             '--port', str(base_port + i), '--delay', str(delay)],
+        ))
+    urls = [f'http://127.0.0.1:{base_port + i}' for i in range(count)]
+    for url in urls:
+        wait_for(url + '/')
+    return stubs, urls
+
+
+def start_app(args):
+    flags, app = WORKER_CLASSES[args.worker_class]
+    cmd = [
+        sys.executable, '-m', 'gunicorn', '-b', f'127.0.0.1:{args.port}',
+        '-w', str(args.workers), '--timeout', str(int(args.timeout) + 30), '--backlog', '4096',
+    ] + flags
+    if args.worker_class == 'gthread':
+        cmd += ['--threads', str(args.threads)]
+    cmd.append(app)
+    env = dict(os.environ)
+    if args.coalesce_dir:
+        env['LLMS_COALESCE_LOCK_DIR'] = args.coalesce_dir
+    server = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not wait_for(f'http://127.0.0.1:{args.port}/api/llms/coalescing'):
+        server.kill()
+        raise SystemExit('app did not start under gunicorn')
+    return server
+
+
+async def run_step(client, app_url, stub_urls, rate, duration, args, rng):
+    """Offer ``rate`` requests per second for ``duration`` seconds"""
+    results = []
+    tasks = []
+
+    async def one(kind, url, scheduled):
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            response = await client.post(app_url + ENDPOINTS[kind], json={'url': url})
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        results.append((kind, ok, time.perf_counter() - scheduled))
+
+    started = time.perf_counter()
+    at = 0.0
+    sequence = 0
+    while True:
+        at += rng.expovariate(rate) if args.arrivals == 'poisson' else 1.0 / rate
+        if at >= duration:
+            break
+        kind = 'advanced' if rng.random() < args.advanced_ratio else 'basic'
+        stub = stub_urls[sequence % len(stub_urls)]
+        # Distinct query strings keep requests from being coalesced
+        url = f'{stub}/?n={sequence}' if args.distinct_urls else f'{stub}/'
+        sequence += 1
+        tasks.append(asyncio.ensure_future(one(kind, url, started + at)))
+
+    await asyncio.gather(*tasks)
+    wall = time.perf_counter() - started
+    return summarize(rate, results, duration, wall)
+
+
+def summarize(rate, results, duration, wall):
+    row = {
+        'offered_rps': rate,
+        'sent': len(results),
+        # Poisson arrivals rarely hit the nominal rate exactly
+        'sent_rps': round(len(results) / duration, 2),
+        'wall_s': round(wall, 2),
+    }
+    ok_latencies = sorted(latency for _, ok, latency in results if ok)
+    errors = sum(1 for _, ok, _ in results if not ok)
+    row['throughput_rps'] = round(len(ok_latencies) / wall, 2) if wall else 0.0
+    row['error_rate'] = round(errors / len(results), 4) if results else 0.0
+    for pct in (50, 95, 99):
+        row[f'p{pct}_ms'] = round(percentile(ok_latencies, pct) * 1000, 1)
+    for kind in ENDPOINTS:
+        kind_latencies = sorted(latency for k, ok, latency in results if k == kind and ok)
+        kind_total = sum(1 for k, _, _ in results if k == kind)
+        kind_errors = sum(1 for k, ok, _ in results if k == kind and not ok)
+        row[f'{kind}_p99_ms'] = round(percentile(kind_latencies, 99) * 1000, 1)
+        row[f'{kind}_error_rate'] = round(kind_errors / kind_total, 4) if kind_total else 0.0
+    return row
+
+
+def is_saturated(row, args):
+    return (
+        row['error_rate'] > args.max_error_rate
+        or row['p99_ms'] > args.slo_p99_ms
+        or row['throughput_rps'] < 0.9 * row['sent_rps']
+    )
+
+
+async def drive(args, stub_urls):
+    rng = random.Random(args.seed)
+    app_url = f'http://127.0.0.1:{args.port}'
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=0)
+    rows = []
+    saturation = None
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        for rate in args.rates:
+            row = await run_step(client, app_url, stub_urls, rate, args.duration, args, rng)
+            row['saturated'] = is_saturated(row, args)
+            rows.append(row)
+            print(
+                f"{rate:>8.1f} rps offered  {row['throughput_rps']:>8.2f} rps ok  "
+                f"p50 {row['p50_ms']:>8.1f}ms  p95 {row['p95_ms']:>8.1f}ms  p99 {row['p99_ms']:>8.1f}ms  "
+                f"errors {row['error_rate']:>6.1%}{'  SATURATED' if row['saturated'] else ''}",
+                flush=True,
+            )
+            if row['saturated']:
+                saturation = saturation or rate
+                if not args.keep_going:
+                    break
+    return rows, saturation
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--worker-class', choices=sorted(WORKER_CLASSES), default='gthread')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4, help='threads per gthread worker')
+    parser.add_argument('--rates', default='2,5,10,20,40,80',
+                        help='comma-separated offered request rates (requests/second)')
+    parser.add_argument('--duration', type=float, default=15.0, help='seconds per rate step')
+    parser.add_argument('--arrivals', choices=('poisson', 'uniform'), default='poisson')
+    parser.add_argument('--advanced-ratio', type=float, default=0.5,
+                        help='fraction of requests sent to /api/enhanced/generate-advanced')
+    parser.add_argument('--stubs', type=int, default=4, help='number of stub target sites')
+    parser.add_argument('--stub-delay', type=float, default=0.2, help='stub site response delay in seconds')
+    parser.add_argument('--distinct-urls', action=argparse.BooleanOptionalAction, default=True,
+                        help='vary URLs so requests are not coalesced')
+    parser.add_argument('--coalesce-dir', help='set LLMS_COALESCE_LOCK_DIR for the app')
+    parser.add_argument('--slo-p99-ms', type=float, default=5000.0)
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--keep-going', action='store_true', help='continue past the saturation point')
+    parser.add_argument('--timeout', type=float, default=60.0, help='client timeout per request')
+    parser.add_argument('--max-connections', type=int, default=4000)
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--stub-port', type=int, default=8801)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--csv', help='write the latency/throughput curve to this CSV file')
+    args = parser.parse_args()
+    args.rates = [float(rate) for rate in args.rates.split(',')]
+
+    stubs = []
+    server = None
+    try:
+        stubs, stub_urls = start_stubs(args.stubs, args.stub_port, args.stub_delay)
+        server = start_app(args)
+        model = args.worker_class + (f' x{args.threads} threads' if args.worker_class == 'gthread' else '')
+        print(f"{model}, {args.workers} workers, stub delay {args.stub_delay}s, "
+              f"{args.advanced_ratio:.0%} advanced, {args.duration:.0f}s per step")
+        rows, saturation = asyncio.run(drive(args, stub_urls))
+    finally:
+        if server is not None:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=30)
+        for stub in stubs:
+            stub.terminate()
+
+    if saturation is None:
+        print("no saturation within the tested rates")
+    else:
+        sustained = [row['throughput_rps'] for row in rows if not row['saturated']]
+        best = max(sustained) if sustained else 0.0
+        print(f"saturation at {saturation:g} rps offered; best sustained throughput {best:.2f} rps")
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"wrote {args.csv}")
+
+
+if __name__ == '__main__':
+    main()
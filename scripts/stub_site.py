@@ -0,0 +1,86 @@
+"""Local stub target site for load and timeout experiments.
+
+Serves a small HTML page with navigation, documentation and API links after
+an artificial delay. It is asyncio based so it can hold thousands of slow
+responses open without a thread per connection.
+
+    python scripts/stub_site.py --port 8801 --delay 5
+"""
+import argparse
+import asyncio
+
+PAGE = """<!doctype html>
+<html><head><title>Stub Site {port}</title>
+<meta name="description" content="A local stub site used to exercise the llms.txt generator under load.">
+</head><body>
+<nav><a href="/">Home</a> <a href="/about">About us</a> <a href="/products">Products</a></nav>
+<main>
+<h1>Stub Site</h1>
+<p>This page exists so the generator has realistic links and content to extract while a load test runs.</p>
+<ul>
+<li><a href="/docs/getting-started">Getting started guide</a></li>
+<li><a href="/docs/reference">API reference</a></li>
+<li><a href="/blog/launch">Launch blog post</a></li>
+<li><a href="/support/faq">Support FAQ</a></li>
+<li><a href="/pricing">Pricing plans</a></li>
+<li><a href="/careers">Careers</a></li>
+</ul>
+</main></body></html>
+"""
+
+
+async def _handle(reader, writer, port, delay):
+    try:
+        request_line = await reader.readline()
+        while True:
+            line = await reader.readline()
+            if not line or line in (b'\r\n', b'\n'):
+                break
+
+        path = request_line.split()[1].decode('latin-1') if request_line.count(b' ') >= 2 else '/'
+        if path.startswith('/dead'):
+            # Accept the connection but never answer
+            await asyncio.sleep(3600)
+            return
+
+        if path.startswith('/slow/'):
+            # /slow/<seconds> overrides the default delay
+            await asyncio.sleep(float(path.split('/')[2].split('?')[0] or 0))
+        elif delay:
+            await asyncio.sleep(delay)
+        status = b'500 Internal Server Error' if path.startswith('/error') else b'200 OK'
+        body = PAGE.format(port=port).encode('utf-8')
+        writer.write(
+            b'HTTP/1.1 ' + status + b'\r\n'
+            b'Content-Type: text/html; charset=utf-8\r\n'
+            b'Content-Length: ' + str(len(body)).encode('ascii') + b'\r\n'
+            b'Connection: close\r\n\r\n' + body
+        )
+        await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(port, delay):
+    server = await asyncio.start_server(
+        lambda r, w: _handle(r, w, port, delay), '127.0.0.1', port, backlog=4096
+    )
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8801)
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds to wait before answering')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.port, args.delay))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
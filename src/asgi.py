@@ -0,0 +1,307 @@
+"""ASGI entry point with an async serving path for the fetch-heavy endpoints.
+
+The generator endpoints spend nearly all of their time waiting on the target
+site. Here they are served natively on the event loop: the page is fetched
+with a shared ``httpx.AsyncClient`` and only the CPU-bound parse runs in a
+small thread pool (or in the process pool when ``LLMS_PARSE_POOL_SIZE`` is
+set), so thousands of slow fetches need just a handful of OS threads. Every
+other route is handed to the regular Flask app.
+
+Run with:
+    uvicorn src.asgi:app --workers 2
+or
+    gunicorn -k uvicorn.workers.UvicornWorker -w 2 src.asgi:app
+"""
+import os
+import time
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from asgiref.wsgi import WsgiToAsgi
+
+from src.main import app as flask_app
+from src.routes.llms_generator import LLMSGenerator
+from src.routes.enhanced_llms_generator import EnhancedLLMSGenerator, LINKED_PAGES_BUDGET, parse_llms_full_options
+from src.utils.single_flight import AsyncSingleFlight, analysis_flight, coalesce_key
+from src.utils.links import json_default
+from src.utils.fetch import HostUnavailable, async_fetch
+from src.utils.parse_pool import parse_pool, run_local
+
+PARSE_THREADS = int(os.environ.get('LLMS_ASYNC_PARSE_THREADS', '4'))
+MAX_CONNECTIONS = int(os.environ.get('LLMS_ASYNC_MAX_CONNECTIONS', '1000'))
+
+wsgi_app = WsgiToAsgi(flask_app)
+async_flight = AsyncSingleFlight()
+_parse_executor = ThreadPoolExecutor(max_workers=PARSE_THREADS, thread_name_prefix='llms-parse')
+_client = None
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=100),
+        )
+    return _client
+
+
+async def _fetch(url, headers, timeout):
+    response = await async_fetch(_get_client(), url, headers=headers, max_timeout=timeout)
+    response.raise_for_status()
+    return response.content
+
+
+async def _run_parse(generator, method, content):
+    if parse_pool.enabled:
+        return await parse_pool.analyze_async(generator, method, content)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_parse_executor, run_local, generator, method, content)
+
+
+async def _analyze_basic(url):
+    generator = LLMSGenerator(url)
+    try:
+        content = await _fetch(url, LLMSGenerator.HEADERS, LLMSGenerator.TIMEOUT)
+    except (httpx.HTTPError, HostUnavailable) as e:
+        print(f"Error analyzing website: {str(e)}")
+        return False, generator
+    return await _run_parse(generator, 'analyze_website', content), generator
+
+
+async def _analyze_advanced(url):
+    generator = EnhancedLLMSGenerator(url)
+    try:
+        content = await _fetch(url, EnhancedLLMSGenerator.HEADERS, EnhancedLLMSGenerator.TIMEOUT)
+    except (httpx.HTTPError, HostUnavailable) as e:
+        print(f"Error extracting basic content: {str(e)}")
+        generator.analysis_steps.append("Initializing advanced analysis...")
+        generator.analysis_steps.append("Extracting basic website content...")
+        return False, generator
+    return await _run_parse(generator, 'analyze_website_advanced', content), generator
+
+
+async def _fetch_linked_pages(generator, max_pages, max_chars=20000, budget=LINKED_PAGES_BUDGET):
+    """Async counterpart of ``EnhancedLLMSGenerator._fetch_linked_pages``"""
+    # Same per-request fan-out and time budget as the WSGI path
+    limit = asyncio.Semaphore(8)
+    loop = asyncio.get_running_loop()
+    deadline = time.monotonic() + budget
+
+    async def load(weight, link):
+        async with limit:
+            remaining = deadline - time.monotonic()
+            if remaining < 1:
+                return None
+            url = link.url
+            try:
+                content = await _fetch(url, EnhancedLLMSGenerator.HEADERS, min(EnhancedLLMSGenerator.TIMEOUT, remaining))
+            except (httpx.HTTPError, HostUnavailable) as e:
+                print(f"Error fetching linked page {url}: {str(e)}")
+                return None
+        text = await loop.run_in_executor(_parse_executor, generator.extract_page_text, content, max_chars)
+        return link, weight, text
+
+    tasks = [asyncio.ensure_future(load(weight, link)) for weight, link in generator.rank_linked_pages(max_pages)]
+    if not tasks:
+        return []
+    done, pending = await asyncio.wait(tasks, timeout=budget)
+    for task in pending:
+        task.cancel()
+    pages = [task.result() for task in tasks if task in done and task.exception() is None]
+    return [page for page in pages if page and page[2]]
+
+
+def _normalize_url(data):
+    url = (data or {}).get('url')
+    if not url:
+        return None
+    # Validate URL format
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return url
+
+
+async def analyze_url(data):
+    url = _normalize_url(data)
+    if not url:
+        return {'error': 'URL is required'}, 400
+
+    success, generator = await async_flight.do(coalesce_key(url, 'basic'), lambda: _analyze_basic(url))
+    if success:
+        return {'success': True, 'data': generator.site_data}, 200
+    return {'error': 'Failed to analyze website'}, 500
+
+
+async def generate_llms_txt(data):
+    url = _normalize_url(data)
+    if not url:
+        return {'error': 'URL is required'}, 400
+
+    success, generator = await async_flight.do(coalesce_key(url, 'basic'), lambda: _analyze_basic(url))
+    if not success:
+        return {'error': 'Failed to analyze website'}, 500
+
+    llms_content = generator.generate_llms_txt()
+    if not llms_content:
+        return {'error': 'Failed to generate llms.txt content'}, 500
+    return {'success': True, 'content': llms_content}, 200
+
+
+async def analyze_url_advanced(data):
+    url = _normalize_url(data)
+    if not url:
+        return {'error': 'URL is required'}, 400
+
+    success, generator = await async_flight.do(coalesce_key(url, 'advanced'), lambda: _analyze_advanced(url))
+    if success:
+        return {
+            'success': True,
+            'data': generator.site_data,
+            'analysis_steps': generator.analysis_steps,
+            'quality_score': generator.quality_score
+        }, 200
+    return {
+        'error': 'Failed to analyze website',
+        'analysis_steps': generator.analysis_steps
+    }, 500
+
+
+async def generate_llms_txt_advanced(data):
+    url = _normalize_url(data)
+    if not url:
+        return {'error': 'URL is required'}, 400
+
+    success, generator = await async_flight.do(coalesce_key(url, 'advanced'), lambda: _analyze_advanced(url))
+    if not success:
+        return {
+            'error': 'Failed to analyze website',
+            'analysis_steps': generator.analysis_steps
+        }, 500
+
+    llms_content = generator.generate_enhanced_llms_txt()
+    if not llms_content:
+        return {'error': 'Failed to generate llms.txt content'}, 500
+    return {
+        'success': True,
+        'content': llms_content,
+        'analysis_steps': generator.analysis_steps,
+        'quality_score': generator.quality_score,
+        'metadata': {
+            'title': generator.site_data.get('title'),
+            'description': generator.site_data.get('description'),
+            'ai_insights': generator.site_data.get('ai_analysis', {})
+        }
+    }, 200
+
+
+async def generate_llms_full(data):
+    url = _normalize_url(data)
+    if not url:
+        return {'error': 'URL is required'}, 400
+
+    try:
+        token_budget, max_pages, include_pages = parse_llms_full_options(data)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+
+    success, generator = await async_flight.do(coalesce_key(url, 'advanced'), lambda: _analyze_advanced(url))
+    if not success:
+        return {
+            'error': 'Failed to analyze website',
+            'analysis_steps': generator.analysis_steps
+        }, 500
+
+    pages = await _fetch_linked_pages(generator, max_pages) if include_pages else []
+    loop = asyncio.get_running_loop()
+    content, token_estimate, sections = await loop.run_in_executor(
+        _parse_executor, generator.generate_llms_full_txt, token_budget, include_pages, max_pages, pages
+    )
+    if not content:
+        return {'error': 'Failed to generate llms-full.txt content'}, 500
+    return {
+        'success': True,
+        'content': content,
+        'token_budget': token_budget,
+        'token_estimate': token_estimate,
+        'sections_included': len(sections),
+        'sections_truncated': sum(1 for section in sections if section.truncated),
+        'analysis_steps': generator.analysis_steps,
+        'quality_score': generator.quality_score
+    }, 200
+
+
+ASYNC_ROUTES = {
+    '/api/llms/analyze': analyze_url,
+    '/api/llms/generate': generate_llms_txt,
+    '/api/enhanced/analyze-advanced': analyze_url_advanced,
+    '/api/enhanced/generate-advanced': generate_llms_txt_advanced,
+    '/api/enhanced/generate-full': generate_llms_full,
+}
+
+
+async def _read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def _send_json(send, payload, status):
+    body = json.dumps(payload, default=json_default).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('ascii')),
+            (b'access-control-allow-origin', b'*'),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if _client is not None:
+                await _client.aclose()
+            _parse_executor.shutdown(wait=False)
+            parse_pool.shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+
+    if scope['type'] == 'http':
+        path = scope['path'].rstrip('/')
+        handler = ASYNC_ROUTES.get(path)
+        if handler is not None and scope['method'] == 'POST':
+            body = await _read_body(receive)
+            if body is None:
+                return
+            try:
+                data = json.loads(body or b'null')
+                payload, status = await handler(data)
+            except Exception as e:
+                payload, status = {'error': str(e)}, 500
+            return await _send_json(send, payload, status)
+
+        if path == '/api/llms/coalescing' and scope['method'] == 'GET':
+            stats = analysis_flight.stats()
+            stats['async'] = async_flight.stats()
+            return await _send_json(send, stats, 200)
+
+    return await wsgi_app(scope, receive, send)
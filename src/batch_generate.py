@@ -0,0 +1,156 @@
+"""Generate llms.txt files offline from archived crawls.
+
+Feeds WARC files or directories of saved HTML through the same extraction and
+categorization code the API uses, without any live HTTP requests. Parsing is
+CPU-bound, so pages are processed in a pool of worker processes while the
+archive is streamed record by record.
+
+    python -m src.batch_generate crawl.warc.gz --out llms/ --mode advanced
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.utils.archive import iter_archive_pages
+from src.utils.parse_pool import disable_parse_pool
+
+
+def generate_from_content(url, content, mode):
+    """Run the generator for one archived page and return its llms.txt"""
+    if mode == 'advanced':
+        from src.routes.enhanced_llms_generator import EnhancedLLMSGenerator
+        generator = EnhancedLLMSGenerator(url)
+        if not generator.analyze_website_advanced(content):
+            return None
+        return generator.generate_enhanced_llms_txt()
+
+    from src.routes.llms_generator import LLMSGenerator
+    generator = LLMSGenerator(url)
+    if not generator.analyze_website(content):
+        return None
+    return generator.generate_llms_txt()
+
+
+def _generate_task(host, url, is_entry, content, mode):
+    try:
+        return host, url, is_entry, generate_from_content(url, content, mode), None
+    except Exception as e:
+        return host, url, is_entry, None, str(e)
+
+
+def _output_path(out_dir, host):
+    safe_host = host.replace(':', '_').replace('/', '_')
+    return os.path.join(out_dir, safe_host, 'llms.txt')
+
+
+class BatchRun:
+    """Dispatch one task per site and collect results as they complete
+
+    The first HTML page seen for a host is processed straight away; if the
+    host's home page turns up later in the archive it is processed too and
+    its result takes precedence. Nothing is buffered per host beyond a flag.
+    """
+
+    def __init__(self, out_dir, mode, processes, window=None, progress_every=100):
+        self.out_dir = out_dir
+        self.mode = mode
+        self.processes = processes
+        self.window = window or processes * 2
+        self.progress_every = progress_every
+        self.dispatched = {}
+        self.written_entry = set()
+        self.written = set()
+        self.failed = {}
+        self.pages_seen = 0
+        self.started = None
+
+    def run(self, pages):
+        self.started = time.time()
+        pending = set()
+        with ProcessPoolExecutor(max_workers=self.processes, initializer=disable_parse_pool) as pool:
+            for page in pages:
+                self.pages_seen += 1
+                host = page.host
+                is_entry = page.is_entry
+                state = self.dispatched.get(host)
+                if state == 'entry' or (state == 'fallback' and not is_entry):
+                    continue
+                self.dispatched[host] = 'entry' if is_entry else 'fallback'
+
+                # Keep a bounded number of pages in flight so the archive is
+                # never read far ahead of the workers.
+                if len(pending) >= self.window:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self._collect(done)
+                pending.add(pool.submit(_generate_task, host, page.url, is_entry, page.content, self.mode))
+
+            done, _ = wait(pending)
+            self._collect(done)
+
+        return self.report()
+
+    def _collect(self, futures):
+        for future in futures:
+            host, url, is_entry, content, error = future.result()
+            if host in self.written_entry:
+                continue
+            if not content:
+                if host not in self.written:
+                    self.failed[host] = error or f"Failed to generate llms.txt for {url}"
+                continue
+
+            path = _output_path(self.out_dir, host)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            is_new = host not in self.written
+            self.written.add(host)
+            self.failed.pop(host, None)
+            if is_entry:
+                self.written_entry.add(host)
+
+            if is_new and self.progress_every and len(self.written) % self.progress_every == 0:
+                elapsed = time.time() - self.started
+                print(f"{len(self.written)} sites written, {len(self.written) / elapsed:.1f} sites/s", file=sys.stderr)
+
+    def report(self):
+        elapsed = time.time() - self.started
+        return {
+            'pages_seen': self.pages_seen,
+            'sites': len(self.dispatched),
+            'written': len(self.written),
+            'failed': dict(self.failed),
+            'elapsed': elapsed,
+            'sites_per_second': len(self.written) / elapsed if elapsed else 0.0,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate llms.txt files from WARC files or saved HTML")
+    parser.add_argument('archives', nargs='+', help='WARC/WARC.gz files, directories of WARCs, or saved-HTML directories laid out as <host>/<path>')
+    parser.add_argument('--out', required=True, help='directory to write <host>/llms.txt into')
+    parser.add_argument('--mode', choices=('basic', 'advanced'), default='basic')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    def pages():
+        for archive in args.archives:
+            yield from iter_archive_pages(archive)
+
+    summary = BatchRun(args.out, args.mode, args.processes).run(pages())
+
+    for host, error in sorted(summary['failed'].items()):
+        print(f"Failed {host}: {error}", file=sys.stderr)
+    print(
+        f"{summary['written']}/{summary['sites']} sites written from {summary['pages_seen']} pages "
+        f"in {summary['elapsed']:.2f}s ({summary['sites_per_second']:.1f} sites/s)"
+    )
+    return 0 if not summary['failed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,13 +4,26 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from flask import Flask, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from src.models.user import db
 from src.routes.user import user_bp
 from src.routes.llms_generator import llms_bp
 from src.routes.enhanced_llms_generator import enhanced_llms_bp
+from src.routes.refresh import refresh_bp, start_refresh_worker
+from src.utils.links import Link
+
+class LLMSJSONProvider(DefaultJSONProvider):
+    """JSON provider that also serializes compact Link records"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Link):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+app.json = LLMSJSONProvider(app)
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 
 # Enable CORS for all origins
@@ -18,13 +31,19 @@ CORS(app)
 app.register_blueprint(user_bp, url_prefix="/api")
 app.register_blueprint(llms_bp, url_prefix="/api/llms")
 app.register_blueprint(enhanced_llms_bp, url_prefix="/api/enhanced")
+app.register_blueprint(refresh_bp, url_prefix="/api/refresh")
 # uncomment if you need to use database
 app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['USERS_PAGE_SIZE'] = int(os.environ.get('USERS_PAGE_SIZE', 100))
 db.init_app(app)
 with app.app_context():
     db.create_all()
 
+# Regenerate tracked sites in the background as they change
+if os.environ.get('LLMS_REFRESH_ENABLED') == '1':
+    start_refresh_worker(app)
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+
+from src.models.user import db
+
+
+def _timestamp(seconds):
+    if seconds is None:
+        return None
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat()
+
+
+class TrackedSite(db.Model):
+    """A site whose llms.txt is kept fresh by the refresh scheduler"""
+
+    __tablename__ = 'tracked_site'
+    __table_args__ = (db.UniqueConstraint('url', 'mode'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    url = db.Column(db.String(2048), nullable=False)
+    mode = db.Column(db.String(16), nullable=False, default='advanced')
+    visits = db.Column(db.Integer, nullable=False, default=0)
+    intervals = db.Column(db.Integer, nullable=False, default=0)
+    changed_intervals = db.Column(db.Integer, nullable=False, default=0)
+    observed = db.Column(db.Float, nullable=False, default=0.0)
+    content_changes = db.Column(db.Integer, nullable=False, default=0)
+    links_changes = db.Column(db.Integer, nullable=False, default=0)
+    failures = db.Column(db.Integer, nullable=False, default=0)
+    content_hash = db.Column(db.String(40))
+    links_hash = db.Column(db.String(40))
+    # Seconds since the epoch, as read from the scheduler's clock
+    last_visit = db.Column(db.Float)
+    next_visit = db.Column(db.Float)
+    last_error = db.Column(db.Text)
+    llms_txt = db.Column(db.Text)
+
+    def __repr__(self):
+        return f'<TrackedSite {self.mode} {self.url}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'url': self.url,
+            'mode': self.mode,
+            'visits': self.visits,
+            'content_changes': self.content_changes,
+            'links_changes': self.links_changes,
+            'failures': self.failures,
+            'last_visit': _timestamp(self.last_visit),
+            'next_visit': _timestamp(self.next_visit),
+            'last_error': self.last_error,
+            'has_llms_txt': self.llms_txt is not None
+        }
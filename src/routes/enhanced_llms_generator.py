@@ -17,25 +17,96 @@ from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 import time
 import json
+from src.utils.single_flight import analysis_flight, coalesce_key
+from src.utils.url_canon import canonicalize_url, canonical_host, clean_url, find_canonical_url
+from src.utils.links import Link
+from src.utils.fetch import fetch
+from src.utils.token_budget import Section, assemble, split_chunks
+from src.utils.parse_pool import parse_pool
+from concurrent.futures import ThreadPoolExecutor, wait
 
 enhanced_llms_bp = Blueprint('enhanced_llms', __name__)
 
+# How much each link category is worth when fitting llms-full.txt to a budget
+CATEGORY_WEIGHTS = {
+    'Documentation': 1.0,
+    'API': 1.0,
+    'Products': 0.7,
+    'Navigation': 0.6,
+    'Support': 0.6,
+    'Resources': 0.5,
+    'Company': 0.4
+}
+
+# Linked pages fetched for llms-full.txt share one time budget so a request
+# stays well inside gunicorn's default 30 s worker timeout
+MAX_LINKED_PAGES = 50
+LINKED_PAGES_BUDGET = float(os.environ.get('LLMS_FULL_PAGES_BUDGET', '20'))
+
+
+def parse_llms_full_options(data):
+    """Validate an llms-full.txt request body
+
+    Returns ``(token_budget, max_pages, include_pages)`` or raises
+    ValueError with a message for the client.
+    """
+    try:
+        token_budget = int(data.get('token_budget', 32000))
+        max_pages = int(data.get('max_pages', 20))
+    except (TypeError, ValueError):
+        raise ValueError('token_budget and max_pages must be integers')
+    if token_budget < 100:
+        raise ValueError('token_budget must be at least 100')
+    if not 1 <= max_pages <= MAX_LINKED_PAGES:
+        raise ValueError(f'max_pages must be between 1 and {MAX_LINKED_PAGES}')
+
+    include_pages = data.get('include_pages', True)
+    if isinstance(include_pages, str):
+        include_pages = {'true': True, '1': True, 'yes': True,
+                         'false': False, '0': False, 'no': False}.get(include_pages.strip().lower())
+    elif isinstance(include_pages, int) and include_pages in (0, 1):
+        include_pages = bool(include_pages)
+    if not isinstance(include_pages, bool):
+        raise ValueError('include_pages must be true or false')
+    return token_budget, max_pages, include_pages
+
 class EnhancedLLMSGenerator:
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36'
+    }
+    TIMEOUT = 30
+
     def __init__(self, url):
         self.url = url
         self.domain = urlparse(url).netloc
+        self.site_hosts = {canonical_host(url)}
         self.site_data = {}
         self.analysis_steps = []
         self.quality_score = 0
         
-    def analyze_website_advanced(self):
-        """Advanced website analysis with AI and JavaScript rendering"""
+    def analyze_website_advanced(self, content=None):
+        """Advanced website analysis with AI and JavaScript rendering
+        
+        ``content`` may hold the already fetched page body, in which case
+        the basic extraction step makes no request.
+        """
         try:
+            if parse_pool.enabled:
+                if content is None:
+                    try:
+                        content = self._fetch_content()
+                    except requests.exceptions.RequestException as e:
+                        print(f"Error extracting basic content: {str(e)}")
+                        self.analysis_steps.append("Initializing advanced analysis...")
+                        self.analysis_steps.append("Extracting basic website content...")
+                        return False
+                return parse_pool.analyze(self, 'analyze_website_advanced', content)
+            
             self.analysis_steps.append("Initializing advanced analysis...")
             
             # Step 1: Basic content extraction
             self.analysis_steps.append("Extracting basic website content...")
-            basic_success = self._extract_basic_content()
+            basic_success = self._extract_basic_content(content)
             
             if not basic_success:
                 return False
@@ -64,16 +135,25 @@ class EnhancedLLMSGenerator:
             self.analysis_steps.append(f"Error: {str(e)}")
             return False
     
-    def _extract_basic_content(self):
+    def _fetch_content(self):
+        """Fetch the raw body of the main page"""
+        response = fetch(self.url, headers=self.HEADERS, max_timeout=self.TIMEOUT)
+        response.raise_for_status()
+        return response.content
+    
+    def _extract_basic_content(self, content=None):
         """Extract basic content using requests and BeautifulSoup"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36'
-            }
-            response = requests.get(self.url, headers=headers, timeout=30)
-            response.raise_for_status()
+            if content is None:
+                content = self._fetch_content()
+            
+            soup = BeautifulSoup(content, 'html.parser')
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # Links to the page's canonical host count as internal too
+            canonical_url = find_canonical_url(soup, self.url)
+            if canonical_url:
+                self.site_data['canonical_url'] = canonical_url
+                self.site_hosts.add(canonical_host(canonical_url))
             
             # Extract comprehensive metadata
             self.site_data['title'] = self._extract_title(soup)
@@ -237,10 +317,12 @@ class EnhancedLLMSGenerator:
         """Intelligently categorize links using AI and heuristics"""
         all_links = self.site_data.get('raw_links', [])
         
+        # Dedupe on the canonical form but keep the first URL as written
         unique_links = {}
         for link in all_links:
-            if link.get("url"):
-                unique_links[link["url"]] = link
+            url = link.url
+            if url:
+                unique_links.setdefault(canonicalize_url(url), link)
         
         all_links = list(unique_links.values())
         
@@ -266,11 +348,12 @@ class EnhancedLLMSGenerator:
         }
         
         for link in all_links:
-            if not link.get('text') or not link.get('url'):
+            url = link.url
+            if not link.text or not url:
                 continue
                 
-            text_lower = link['text'].lower()
-            url_lower = link['url'].lower()
+            text_lower = link.text.lower()
+            url_lower = url.lower()
             
             # Score each category
             category_scores = {}
@@ -356,19 +439,15 @@ class EnhancedLLMSGenerator:
             if not href or not text or len(text) < 2:
                 continue
             
-            full_url = urljoin(self.url, href)
+            full_url = clean_url(urljoin(self.url, href))
             
             # Only include internal links
             if self._is_internal_link(full_url):
-                links.append({
-                    'text': text,
-                    'url': full_url,
-                    'context': self._get_link_context(link)
-                })
+                links.append(Link(text, full_url, self._get_link_context(link)))
         
         return links
     
-    def _extract_main_content(self, soup):
+    def _extract_main_content(self, soup, max_chars=3000):
         """Extract main content text"""
         # Remove script and style elements
         for script in soup(["script", "style", "nav", "footer", "header"]):
@@ -378,14 +457,14 @@ class EnhancedLLMSGenerator:
         main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=re.compile('content|main'))
         
         if main_content:
-            return main_content.get_text(separator=' ', strip=True)[:3000]
+            return main_content.get_text(separator=' ', strip=True)[:max_chars]
         
         # Fallback to body content
         body = soup.find('body')
         if body:
-            return body.get_text(separator=' ', strip=True)[:3000]
+            return body.get_text(separator=' ', strip=True)[:max_chars]
         
-        return soup.get_text(separator=' ', strip=True)[:3000]
+        return soup.get_text(separator=' ', strip=True)[:max_chars]
     
     def _get_link_context(self, link_element):
         """Get context around the link"""
@@ -396,11 +475,9 @@ class EnhancedLLMSGenerator:
     
     def _is_internal_link(self, url):
         """Check if link is internal"""
-        try:
-            parsed_url = urlparse(url)
-            return parsed_url.netloc == self.domain or parsed_url.netloc == ''
-        except:
+        if not url.startswith(('http://', 'https://')):
             return False
+        return canonical_host(url) in self.site_hosts
     
     def generate_enhanced_llms_txt(self):
         """Generate enhanced llms.txt with AI insights"""
@@ -441,17 +518,129 @@ class EnhancedLLMSGenerator:
                 content.append("")
                 
                 for link in links:
-                    if link.get('text') and link.get('url'):
+                    url = link.url
+                    if link.text and url:
                         # Add context if available
-                        context = link.get('context', '')
+                        context = link.context or ''
                         if context and len(context) > 20:
-                            content.append(f"- [{link['text']}]({link['url']}): {context[:100]}...")
+                            content.append(f"- [{link.text}]({url}): {context[:100]}...")
                         else:
-                            content.append(f"- [{link['text']}]({link['url']})")
+                            content.append(f"- [{link.text}]({url})")
                 
                 content.append("")
         
         return "\n".join(content)
+    
+    def generate_llms_full_txt(self, token_budget, include_pages=True, max_pages=20, pages=None):
+        """Generate llms-full.txt with page content, fitted to a token budget
+        
+        ``pages`` may hold already fetched ``(link, weight, text)`` tuples,
+        otherwise the linked pages are fetched here. Returns the text, its
+        estimated token count and the sections kept.
+        """
+        if not self.site_data:
+            return None, 0, []
+        
+        sections = []
+        
+        # H1 title and description are always kept
+        title = self.site_data.get('title', self.domain)
+        description = (
+            self.site_data.get('ai_description') or 
+            self.site_data.get('description') or 
+            f"Content from {self.domain}"
+        )
+        sections.append(Section(None, f"# {title}\n\n> {description}", 0, len(sections), required=True, truncatable=False))
+        
+        # Importance is tokens times relevance, so the selection's
+        # importance-per-token ranking orders sections by relevance.
+        for i, chunk in enumerate(split_chunks(self.site_data.get('content_text', ''))):
+            section = Section('Overview', chunk, 0, len(sections))
+            section.importance = section.tokens * 0.9 * 0.85 ** i
+            sections.append(section)
+        
+        categorized_links = self.site_data.get('categorized_links', {})
+        for category, links in categorized_links.items():
+            weight = CATEGORY_WEIGHTS.get(category, 0.5)
+            for position, link in enumerate(links):
+                section = Section(category, f"- [{link.text}]({link.url})", 0, len(sections), truncatable=False, compact=True)
+                # Link lines are cheap and make the file navigable; rank them above page text
+                section.importance = section.tokens * (1.0 + weight) * 0.95 ** position
+                sections.append(section)
+        
+        if include_pages:
+            if pages is None:
+                pages = self._fetch_linked_pages(max_pages)
+            for rank, (link, weight, text) in enumerate(pages):
+                for i, chunk in enumerate(split_chunks(text)):
+                    if i == 0:
+                        chunk = f"### [{link.text}]({link.url})\n\n{chunk}"
+                    section = Section('Pages', chunk, 0, len(sections))
+                    section.importance = section.tokens * weight * 0.8 * 0.97 ** rank * 0.8 ** i
+                    sections.append(section)
+        
+        return assemble(sections, token_budget)
+    
+    def rank_linked_pages(self, max_pages):
+        """Return ``(weight, link)`` for the most relevant categorized links"""
+        ranked = []
+        seen = set()
+        for category, links in self.site_data.get('categorized_links', {}).items():
+            weight = CATEGORY_WEIGHTS.get(category, 0.5)
+            for position, link in enumerate(links):
+                if link.url not in seen:
+                    seen.add(link.url)
+                    ranked.append((weight * 0.95 ** position, link))
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return ranked[:max_pages]
+    
+    def extract_page_text(self, content, max_chars=20000):
+        """Extract the main text of a fetched linked page"""
+        return self._extract_main_content(BeautifulSoup(content, 'html.parser'), max_chars)
+    
+    def _fetch_linked_pages(self, max_pages, max_chars=20000, budget=None):
+        """Fetch the main text of the most relevant categorized links
+        
+        All fetches share ``budget`` seconds; pages not loaded by then are
+        left out.
+        """
+        ranked = self.rank_linked_pages(max_pages)
+        budget = LINKED_PAGES_BUDGET if budget is None else budget
+        deadline = time.monotonic() + budget
+        
+        def load(item):
+            weight, link = item
+            remaining = deadline - time.monotonic()
+            if remaining < 1:
+                return None
+            url = link.url
+            try:
+                response = fetch(url, headers=self.HEADERS, max_timeout=min(self.TIMEOUT, remaining))
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                print(f"Error fetching linked page {url}: {str(e)}")
+                return None
+            return link, weight, self.extract_page_text(response.content, max_chars)
+        
+        if not ranked:
+            return []
+        pool = ThreadPoolExecutor(max_workers=min(8, len(ranked)))
+        try:
+            futures = [pool.submit(load, item) for item in ranked]
+            wait(futures, timeout=budget)
+        finally:
+            # Anything still running past the budget is abandoned
+            pool.shutdown(wait=False, cancel_futures=True)
+        pages = [future.result() for future in futures if future.done() and not future.cancelled()]
+        return [page for page in pages if page and page[2]]
+
+def analyze_advanced_shared(url):
+    """Run one advanced analysis for all concurrent requests asking for it"""
+    def analyze():
+        generator = EnhancedLLMSGenerator(url)
+        return generator.analyze_website_advanced(), generator
+
+    return analysis_flight.do(coalesce_key(url, 'advanced'), analyze)
 
 @enhanced_llms_bp.route('/analyze-advanced', methods=['POST'])
 @cross_origin()
@@ -468,9 +657,9 @@ def analyze_url_advanced():
         if not url.startswith(('http://', 'https://')):
             url = 'https://' + url
         
-        generator = EnhancedLLMSGenerator(url)
+        success, generator = analyze_advanced_shared(url)
         
-        if generator.analyze_website_advanced():
+        if success:
             return jsonify({
                 'success': True,
                 'data': generator.site_data,
@@ -501,9 +690,9 @@ def generate_llms_txt_advanced():
         if not url.startswith(('http://', 'https://')):
             url = 'https://' + url
         
-        generator = EnhancedLLMSGenerator(url)
+        success, generator = analyze_advanced_shared(url)
         
-        if generator.analyze_website_advanced():
+        if success:
             llms_content = generator.generate_enhanced_llms_txt()
             
             if llms_content:
@@ -529,6 +718,57 @@ def generate_llms_txt_advanced():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@enhanced_llms_bp.route('/generate-full', methods=['POST'])
+@cross_origin()
+def generate_llms_full():
+    """Generate llms-full.txt content within a token budget"""
+    try:
+        data = request.get_json()
+        url = data.get('url')
+        
+        if not url:
+            return jsonify({'error': 'URL is required'}), 400
+        
+        try:
+            token_budget, max_pages, include_pages = parse_llms_full_options(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Validate URL format
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        
+        success, generator = analyze_advanced_shared(url)
+        
+        if success:
+            content, token_estimate, sections = generator.generate_llms_full_txt(
+                token_budget,
+                include_pages=include_pages,
+                max_pages=max_pages
+            )
+            
+            if content:
+                return jsonify({
+                    'success': True,
+                    'content': content,
+                    'token_budget': token_budget,
+                    'token_estimate': token_estimate,
+                    'sections_included': len(sections),
+                    'sections_truncated': sum(1 for section in sections if section.truncated),
+                    'analysis_steps': generator.analysis_steps,
+                    'quality_score': generator.quality_score
+                })
+            else:
+                return jsonify({'error': 'Failed to generate llms-full.txt content'}), 500
+        else:
+            return jsonify({
+                'error': 'Failed to analyze website',
+                'analysis_steps': generator.analysis_steps
+            }), 500
+            
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @enhanced_llms_bp.route('/progress/<session_id>', methods=['GET'])
 @cross_origin()
 def get_progress(session_id):
@@ -1,32 +1,54 @@
 from flask import Blueprint, request, jsonify, send_file
 from flask_cors import cross_origin
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import re
 import io
 import tempfile
 import os
+from src.utils.single_flight import analysis_flight, coalesce_key
+from src.utils.url_canon import canonicalize_url, canonical_host, clean_url, find_canonical_url
+from src.utils.links import Link
+from src.utils.fetch import fetch, host_health
+from src.utils.parse_pool import parse_pool
 
 llms_bp = Blueprint('llms', __name__)
 
 class LLMSGenerator:
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    }
+    TIMEOUT = 10
+
     def __init__(self, url):
         self.url = url
         self.domain = urlparse(url).netloc
+        self.site_hosts = {canonical_host(url)}
         self.site_data = {}
         
-    def analyze_website(self):
-        """Analyze the website and extract relevant information"""
+    def analyze_website(self, content=None):
+        """Analyze the website and extract relevant information
+        
+        ``content`` may hold the already fetched page body, in which case
+        no request is made.
+        """
         try:
-            # Fetch the main page
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.get(self.url, headers=headers, timeout=10)
-            response.raise_for_status()
+            if content is None:
+                # Fetch the main page
+                response = fetch(self.url, headers=self.HEADERS, max_timeout=self.TIMEOUT)
+                response.raise_for_status()
+                content = response.content
+            
+            if parse_pool.enabled:
+                return parse_pool.analyze(self, 'analyze_website', content)
+            
+            soup = BeautifulSoup(content, 'html.parser')
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # Links to the page's canonical host count as internal too
+            canonical_url = find_canonical_url(soup, self.url)
+            if canonical_url:
+                self.site_data['canonical_url'] = canonical_url
+                self.site_hosts.add(canonical_host(canonical_url))
             
             # Extract basic information
             self.site_data['title'] = self._extract_title(soup)
@@ -102,6 +124,7 @@ class LLMSGenerator:
     def _find_navigation_links(self, soup):
         """Find main navigation links"""
         links = []
+        seen = set()
         
         # Look for nav elements
         nav_elements = soup.find_all(['nav', 'header'])
@@ -111,9 +134,11 @@ class LLMSGenerator:
                 href = link.get('href')
                 text = link.get_text().strip()
                 if href and text and len(text) > 1:
-                    full_url = urljoin(self.url, href)
-                    if self._is_internal_link(full_url):
-                        links.append({'text': text, 'url': full_url})
+                    full_url = clean_url(urljoin(self.url, href))
+                    key = canonicalize_url(full_url)
+                    if key not in seen and self._is_internal_link(full_url):
+                        seen.add(key)
+                        links.append(Link(text, full_url))
         
         return links[:5]  # Return top 5
     
@@ -122,15 +147,18 @@ class LLMSGenerator:
         links = []
         doc_keywords = ['docs', 'documentation', 'guide', 'tutorial', 'help', 'manual']
         
+        seen = set()
         all_links = soup.find_all('a', href=True)
         for link in all_links:
             href = link.get('href')
             text = link.get_text().strip().lower()
             
             if any(keyword in text or keyword in href.lower() for keyword in doc_keywords):
-                full_url = urljoin(self.url, href)
-                if self._is_internal_link(full_url):
-                    links.append({'text': link.get_text().strip(), 'url': full_url})
+                full_url = clean_url(urljoin(self.url, href))
+                key = canonicalize_url(full_url)
+                if key not in seen and self._is_internal_link(full_url):
+                    seen.add(key)
+                    links.append(Link(link.get_text().strip(), full_url))
         
         return links[:3]  # Return top 3
     
@@ -139,15 +167,18 @@ class LLMSGenerator:
         links = []
         api_keywords = ['api', 'reference', 'endpoint', 'swagger', 'openapi']
         
+        seen = set()
         all_links = soup.find_all('a', href=True)
         for link in all_links:
             href = link.get('href')
             text = link.get_text().strip().lower()
             
             if any(keyword in text or keyword in href.lower() for keyword in api_keywords):
-                full_url = urljoin(self.url, href)
-                if self._is_internal_link(full_url):
-                    links.append({'text': link.get_text().strip(), 'url': full_url})
+                full_url = clean_url(urljoin(self.url, href))
+                key = canonicalize_url(full_url)
+                if key not in seen and self._is_internal_link(full_url):
+                    seen.add(key)
+                    links.append(Link(link.get_text().strip(), full_url))
         
         return links[:3]  # Return top 3
     
@@ -156,25 +187,26 @@ class LLMSGenerator:
         links = []
         important_keywords = ['about', 'contact', 'blog', 'news', 'support', 'faq']
         
+        seen = set()
         all_links = soup.find_all('a', href=True)
         for link in all_links:
             href = link.get('href')
             text = link.get_text().strip().lower()
             
             if any(keyword in text or keyword in href.lower() for keyword in important_keywords):
-                full_url = urljoin(self.url, href)
-                if self._is_internal_link(full_url):
-                    links.append({'text': link.get_text().strip(), 'url': full_url})
+                full_url = clean_url(urljoin(self.url, href))
+                key = canonicalize_url(full_url)
+                if key not in seen and self._is_internal_link(full_url):
+                    seen.add(key)
+                    links.append(Link(link.get_text().strip(), full_url))
         
         return links[:3]  # Return top 3
     
     def _is_internal_link(self, url):
         """Check if link is internal to the domain"""
-        try:
-            parsed_url = urlparse(url)
-            return parsed_url.netloc == self.domain or parsed_url.netloc == ''
-        except:
+        if not url.startswith(('http://', 'https://')):
             return False
+        return canonical_host(url) in self.site_hosts
     
     def generate_llms_txt(self):
         """Generate the llms.txt content"""
@@ -199,13 +231,22 @@ class LLMSGenerator:
                 content.append("")
                 
                 for link in links:
-                    if link.get('text') and link.get('url'):
-                        content.append(f"- [{link['text']}]({link['url']})")
+                    url = link.url
+                    if link.text and url:
+                        content.append(f"- [{link.text}]({url})")
                 
                 content.append("")
         
         return "\n".join(content)
 
+def analyze_shared(url):
+    """Analyze a URL once for all concurrent requests asking for it"""
+    def analyze():
+        generator = LLMSGenerator(url)
+        return generator.analyze_website(), generator
+
+    return analysis_flight.do(coalesce_key(url, 'basic'), analyze)
+
 @llms_bp.route('/analyze', methods=['POST'])
 @cross_origin()
 def analyze_url():
@@ -221,9 +262,9 @@ def analyze_url():
         if not url.startswith(('http://', 'https://')):
             url = 'https://' + url
         
-        generator = LLMSGenerator(url)
+        success, generator = analyze_shared(url)
         
-        if generator.analyze_website():
+        if success:
             return jsonify({
                 'success': True,
                 'data': generator.site_data
@@ -249,9 +290,9 @@ def generate_llms_txt():
         if not url.startswith(('http://', 'https://')):
             url = 'https://' + url
         
-        generator = LLMSGenerator(url)
+        success, generator = analyze_shared(url)
         
-        if generator.analyze_website():
+        if success:
             llms_content = generator.generate_llms_txt()
             
             if llms_content:
@@ -267,6 +308,18 @@ def generate_llms_txt():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@llms_bp.route('/coalescing', methods=['GET'])
+@cross_origin()
+def coalescing_stats():
+    """Report how many analyses were shared between concurrent requests"""
+    return jsonify(analysis_flight.stats())
+
+@llms_bp.route('/hosts', methods=['GET'])
+@cross_origin()
+def host_states():
+    """Report learned latency, timeouts and circuit state per target host"""
+    return jsonify(host_health.snapshot())
+
 @llms_bp.route('/download', methods=['POST'])
 @cross_origin()
 def download_llms_txt():
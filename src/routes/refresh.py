@@ -0,0 +1,296 @@
+from flask import Blueprint, request, jsonify, Response
+from flask_cors import cross_origin
+import os
+import time
+import hashlib
+import tempfile
+import threading
+from src.models.user import db
+from src.models.tracked_site import TrackedSite
+from src.routes.llms_generator import analyze_shared
+from src.routes.enhanced_llms_generator import analyze_advanced_shared
+from src.utils.refresh_scheduler import RefreshScheduler, SiteSchedule
+from src.utils.url_canon import canonicalize_url
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+refresh_bp = Blueprint('refresh', __name__)
+
+MODES = ('basic', 'advanced')
+
+
+def _digest(parts):
+    return hashlib.sha1('\x1f'.join(parts).encode('utf-8', 'replace')).hexdigest()
+
+
+def fingerprint(site_data, mode):
+    """Hash a site's content and its categorized links separately
+
+    Returns ``(content_hash, links_hash)`` so the scheduler can tell copy
+    edits apart from navigation changes.
+    """
+    content_keys = ('title', 'description', 'content_text') if mode == 'advanced' else ('title', 'description')
+    content_hash = _digest([str(site_data.get(key) or '') for key in content_keys])
+
+    groups = site_data.get('categorized_links' if mode == 'advanced' else 'links') or {}
+    links = sorted(
+        f"{category}\x1e{link.text}\x1e{canonicalize_url(link.url)}"
+        for category, category_links in groups.items()
+        for link in category_links
+    )
+    return content_hash, _digest(links)
+
+
+def regenerate(url, mode):
+    """Analyze ``url`` and return ``(site_data, llms_txt)``, or None on failure"""
+    if mode == 'advanced':
+        success, generator = analyze_advanced_shared(url)
+        return (generator.site_data, generator.generate_enhanced_llms_txt()) if success else None
+    success, generator = analyze_shared(url)
+    return (generator.site_data, generator.generate_llms_txt()) if success else None
+
+
+def _schedule_from_row(row, now):
+    site = SiteSchedule(row.url, row.mode, row.next_visit if row.next_visit is not None else now)
+    for field in ('visits', 'intervals', 'changed_intervals', 'observed', 'content_changes',
+                  'links_changes', 'failures', 'content_hash', 'links_hash', 'last_visit'):
+        setattr(site, field, getattr(row, field))
+    return site
+
+
+def _update_row(row, site):
+    for field in ('visits', 'intervals', 'changed_intervals', 'observed', 'content_changes',
+                  'links_changes', 'failures', 'content_hash', 'links_hash', 'last_visit', 'next_visit'):
+        setattr(row, field, getattr(site, field))
+
+
+class RefreshWorker:
+    """Background thread that regenerates tracked sites as they fall due
+
+    The schedule lives in a RefreshScheduler; each visit is written back to
+    the ``tracked_site`` table so change history survives restarts. Sites
+    registered through another process are picked up on the next sync. Under
+    a multi-worker server only the process holding ``lock_path`` runs the
+    loop; without ``fcntl`` (Windows) there is no lock and every process
+    runs its own. ``regenerate`` and ``wait`` can be replaced to drive the
+    worker with a simulated clock.
+    """
+
+    def __init__(self, app, scheduler, regenerate=regenerate, lock_path=None,
+                 sync_interval=60.0, wait=None):
+        self.app = app
+        self.scheduler = scheduler
+        self.regenerate = regenerate
+        self.lock_path = lock_path
+        self.sync_interval = sync_interval
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._wait = wait or self._wake.wait
+        self._thread = None
+        self._lock_file = None
+        self.refreshed = 0
+        self.changed = 0
+        self.failed = 0
+
+    def sync(self, now=None):
+        """Load new tracked sites from the database and drop deleted ones"""
+        now = self.scheduler.clock() if now is None else now
+        with self.app.app_context():
+            rows = TrackedSite.query.all()
+        keys = set()
+        for row in rows:
+            keys.add((row.url, row.mode))
+            if self.scheduler.get(row.url, row.mode) is None:
+                self.scheduler.restore(_schedule_from_row(row, now))
+        for site in self.scheduler.snapshot()['sites']:
+            if (site['url'], site['mode']) not in keys:
+                self.scheduler.remove(site['url'], site['mode'])
+
+    def run_pending(self, now=None):
+        """Refresh every site that is due and within budget; returns how many ran"""
+        due = self.scheduler.pop_due(now)
+        for site in due:
+            try:
+                self.refresh(site, now)
+            except Exception as e:
+                print(f"Error refreshing {site.url}: {str(e)}")
+        return len(due)
+
+    def refresh(self, site, now=None):
+        error = None
+        try:
+            result = self.regenerate(site.url, site.mode)
+        except Exception as e:
+            result, error = None, str(e)
+
+        with self.app.app_context():
+            try:
+                row = TrackedSite.query.filter_by(url=site.url, mode=site.mode).first()
+                if row is None:
+                    # Deleted while the refresh was running
+                    self.scheduler.remove(site.url, site.mode)
+                    return
+                if result is None:
+                    self.scheduler.record_failure(site, now)
+                    row.last_error = error or 'Failed to analyze website'
+                    self.failed += 1
+                else:
+                    site_data, llms_txt = result
+                    content_hash, links_hash = fingerprint(site_data, site.mode)
+                    content_changed, links_changed = self.scheduler.record(site, content_hash, links_hash, now)
+                    row.last_error = None
+                    if llms_txt:
+                        row.llms_txt = llms_txt
+                    self.refreshed += 1
+                    self.changed += content_changed or links_changed
+                _update_row(row, site)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                # pop_due took the site off the queue; never leave it unscheduled
+                if site.next_visit is None and self.scheduler.get(site.url, site.mode) is site:
+                    self.scheduler.record_failure(site, now)
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        """Start the worker thread; returns False if another process runs it"""
+        if self.lock_path and fcntl is not None:
+            self._lock_file = open(self.lock_path, 'a')
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                self._lock_file.close()
+                self._lock_file = None
+                return False
+        self._thread = threading.Thread(target=self._run, name='llms-refresh', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        last_sync = None
+        while not self._stopped.is_set():
+            try:
+                now = self.scheduler.clock()
+                if last_sync is None or now - last_sync >= self.sync_interval:
+                    self.sync(now)
+                    last_sync = now
+                self.run_pending()
+            except Exception as e:
+                print(f"Error in refresh worker: {str(e)}")
+            wait = self.scheduler.seconds_until_next()
+            self._wait(self.sync_interval if wait is None else min(wait, self.sync_interval))
+            self._wake.clear()
+
+
+refresh_scheduler = RefreshScheduler(
+    fetch_rate=float(os.environ.get('LLMS_REFRESH_FETCHES_PER_HOUR', '120')) / 3600,
+    burst=int(os.environ.get('LLMS_REFRESH_BURST', '5')),
+    min_interval=float(os.environ.get('LLMS_REFRESH_MIN_INTERVAL', '900')),
+    max_interval=float(os.environ.get('LLMS_REFRESH_MAX_INTERVAL', str(7 * 86400))),
+    initial_interval=float(os.environ.get('LLMS_REFRESH_INITIAL_INTERVAL', '86400')),
+)
+refresh_worker = None
+
+
+def start_refresh_worker(app):
+    """Start the background refresh worker for ``app`` (at most one per host)"""
+    global refresh_worker
+    lock_path = os.environ.get('LLMS_REFRESH_LOCK', os.path.join(tempfile.gettempdir(), 'llms-refresh.lock'))
+    worker = RefreshWorker(app, refresh_scheduler, lock_path=lock_path)
+    if worker.start():
+        refresh_worker = worker
+    return refresh_worker
+
+
+def _normalize_url(url):
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return canonicalize_url(url)
+
+
+@refresh_bp.route('/sites', methods=['POST'])
+@cross_origin()
+def track_site():
+    """Track a URL so its llms.txt is regenerated as the site changes"""
+    data = request.get_json() or {}
+    url = data.get('url')
+    mode = data.get('mode', 'advanced')
+
+    if not url:
+        return jsonify({'error': 'URL is required'}), 400
+    if mode not in MODES:
+        return jsonify({'error': f"mode must be one of {', '.join(MODES)}"}), 400
+
+    url = _normalize_url(url)
+    row = TrackedSite.query.filter_by(url=url, mode=mode).first()
+    if row is not None:
+        return jsonify(row.to_dict())
+
+    row = TrackedSite(url=url, mode=mode, next_visit=refresh_scheduler.clock())
+    db.session.add(row)
+    db.session.commit()
+    if refresh_worker is not None:
+        refresh_scheduler.add(url, mode, next_visit=row.next_visit)
+        refresh_worker.wake()
+    return jsonify(row.to_dict()), 201
+
+
+@refresh_bp.route('/sites', methods=['GET'])
+@cross_origin()
+def list_tracked_sites():
+    """List tracked sites with their observed change rates and next visits"""
+    schedule = {(s['url'], s['mode']): s for s in refresh_scheduler.snapshot()['sites']}
+    sites = []
+    for row in TrackedSite.query.order_by(TrackedSite.id).all():
+        site = row.to_dict()
+        state = schedule.get((row.url, row.mode))
+        if state is None:
+            state = _schedule_from_row(row, time.time()).to_dict()
+        site['change_rate_per_day'] = state['change_rate_per_day']
+        site['interval_seconds'] = state['interval_seconds']
+        sites.append(site)
+
+    scheduler = refresh_scheduler.snapshot()
+    return jsonify({
+        'sites': sites,
+        'worker_running': refresh_worker is not None and refresh_worker.running,
+        'fetch_rate_per_hour': round(scheduler['fetch_rate'] * 3600, 3),
+        'planned_fetch_rate_per_hour': round(scheduler['planned_fetch_rate'] * 3600, 3)
+    })
+
+
+@refresh_bp.route('/sites/<int:site_id>', methods=['DELETE'])
+@cross_origin()
+def untrack_site(site_id):
+    row = TrackedSite.query.get_or_404(site_id)
+    db.session.delete(row)
+    db.session.commit()
+    refresh_scheduler.remove(row.url, row.mode)
+    return '', 204
+
+
+@refresh_bp.route('/sites/<int:site_id>/llms.txt', methods=['GET'])
+@cross_origin()
+def tracked_llms_txt(site_id):
+    """Return the most recently generated llms.txt for a tracked site"""
+    row = TrackedSite.query.get_or_404(site_id)
+    if row.llms_txt is None:
+        return jsonify({'error': 'Site has not been generated yet'}), 404
+    return Response(row.llms_txt, mimetype='text/plain')
@@ -1,12 +1,77 @@
-from flask import Blueprint, jsonify, request
+import json
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context, url_for
+from sqlalchemy.exc import DBAPIError, IntegrityError
 from src.models.user import User, db
 
 user_bp = Blueprint('user', __name__)
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+EXPORT_BATCH_SIZE = 1000
+
+def _row_dict(row):
+    return {'id': row.id, 'username': row.username, 'email': row.email}
+
+def _page_size():
+    default = current_app.config.get('USERS_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    maximum = current_app.config.get('USERS_MAX_PAGE_SIZE', MAX_PAGE_SIZE)
+    limit = request.args.get('limit', default, type=int)
+    return max(1, min(limit, maximum))
+
 @user_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    """List users one keyset page at a time, ordered by id
+
+    Pass ``after`` (the last id seen) and ``limit``; the next page's cursor is
+    returned in the ``X-Next-Cursor`` and ``Link`` headers.
+    """
+    limit = _page_size()
+    after = request.args.get('after', 0, type=int)
+
+    rows = (
+        db.session.query(User.id, User.username, User.email)
+        .filter(User.id > after)
+        .order_by(User.id)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    response = jsonify([_row_dict(row) for row in rows])
+    if has_more:
+        next_cursor = rows[-1].id
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+        next_url = url_for('user.get_users', after=next_cursor, limit=limit, _external=True)
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+
+    response.add_etag()
+    return response.make_conditional(request)
+
+@user_bp.route('/users/export', methods=['GET'])
+def export_users():
+    """Stream every user as one JSON array without loading the table"""
+    def generate():
+        yield '['
+        after = 0
+        first = True
+        while True:
+            rows = (
+                db.session.query(User.id, User.username, User.email)
+                .filter(User.id > after)
+                .order_by(User.id)
+                .limit(EXPORT_BATCH_SIZE)
+                .all()
+            )
+            if not rows:
+                break
+            chunk = ','.join(json.dumps(_row_dict(row)) for row in rows)
+            yield chunk if first else ',' + chunk
+            first = False
+            after = rows[-1].id
+        yield ']'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():
@@ -17,6 +82,63 @@ def create_user():
     db.session.commit()
     return jsonify(user.to_dict()), 201
 
+@user_bp.route('/users/bulk', methods=['POST'])
+def bulk_create_users():
+    """Create or update many users in a single transaction
+
+    Accepts a JSON list of ``{"username", "email"}`` objects (or
+    ``{"users": [...]}``). Existing usernames have their email updated unless
+    ``?upsert=false`` is given, in which case any conflict rejects the batch.
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('users')
+    if not isinstance(data, list) or not data:
+        return jsonify({'error': 'A non-empty list of users is required'}), 400
+
+    rows = []
+    for index, item in enumerate(data):
+        if not isinstance(item, dict) or not all(
+            isinstance(item.get(field), str) and item[field] for field in ('username', 'email')
+        ):
+            return jsonify({'error': f'User at index {index} needs a string username and email'}), 400
+        rows.append({'username': item['username'], 'email': item['email']})
+
+    upsert = request.args.get('upsert', 'true').lower() not in ('0', 'false', 'no')
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy import insert
+        upsert = False
+
+    if upsert:
+        # ON CONFLICT cannot touch the same row twice in one statement, so
+        # the last entry for a repeated username wins
+        rows = list({row['username']: row for row in rows}.values())
+
+    stmt = insert(User)
+    if upsert:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.username],
+            set_={'email': stmt.excluded.email},
+        )
+
+    try:
+        # One executemany on the Core table, skipping per-object ORM work
+        db.session.execute(stmt, rows)
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        return jsonify({'error': 'Conflicting users, nothing was written', 'detail': str(e.orig)}), 409
+    except DBAPIError as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to write users, nothing was written', 'detail': str(e.orig)}), 500
+
+    return jsonify({'success': True, 'processed': len(rows), 'upsert': upsert}), 200
+
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
     user = User.query.get_or_404(user_id)
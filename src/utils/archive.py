@@ -0,0 +1,168 @@
+import os
+import gzip
+import zlib
+from urllib.parse import urlparse
+
+HTML_EXTENSIONS = ('.html', '.htm')
+ENTRY_PATHS = ('', '/', '/index.html', '/index.htm')
+
+
+class ArchivedPage:
+    """One archived HTML response"""
+
+    __slots__ = ('url', 'content')
+
+    def __init__(self, url, content):
+        self.url = url
+        self.content = content
+
+    @property
+    def host(self):
+        return urlparse(self.url).netloc.lower()
+
+    @property
+    def is_entry(self):
+        """Whether this page is the site's home page"""
+        return urlparse(self.url).path in ENTRY_PATHS
+
+
+def iter_warc_pages(path):
+    """Stream successful HTML responses out of a WARC or WARC.gz file
+
+    Records are read one at a time, so memory use is bounded by the largest
+    single record rather than by the archive.
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            if not line.strip():
+                continue
+            if not line.startswith(b'WARC/'):
+                raise ValueError(f"Malformed WARC record header in {path}: {line[:40]!r}")
+
+            headers = _read_headers(f)
+            length = int(headers.get('content-length', 0))
+            url = headers.get('warc-target-uri', '').strip('<>')
+
+            if headers.get('warc-type') != 'response' or not url.startswith(('http://', 'https://')):
+                f.seek(length, os.SEEK_CUR)
+                continue
+
+            content = _parse_http_response(f.read(length))
+            if content is not None:
+                yield ArchivedPage(url, content)
+
+
+def iter_html_dir_pages(root, scheme='https'):
+    """Yield the entry page of each site in a saved-HTML directory
+
+    The directory is laid out as ``<host>/<path>``; ``<host>/index.html`` is
+    preferred, otherwise the first HTML file found for the host is used.
+    """
+    for host in sorted(os.listdir(root)):
+        host_dir = os.path.join(root, host)
+        if not os.path.isdir(host_dir):
+            continue
+
+        entry = None
+        for name in ('index.html', 'index.htm'):
+            if os.path.isfile(os.path.join(host_dir, name)):
+                entry = name
+                break
+        if entry is None:
+            entry = _first_html_file(host_dir)
+        if entry is None:
+            continue
+
+        with open(os.path.join(host_dir, entry), 'rb') as f:
+            content = f.read()
+        path = '/' if entry in ('index.html', 'index.htm') else '/' + entry
+        yield ArchivedPage(f"{scheme}://{host}{path}", content)
+
+
+def _first_html_file(host_dir):
+    for dirpath, dirnames, filenames in os.walk(host_dir):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(HTML_EXTENSIONS):
+                file_path = os.path.join(dirpath, filename)
+                return os.path.relpath(file_path, host_dir).replace(os.sep, '/')
+    return None
+
+
+def iter_archive_pages(path):
+    """Yield pages from a WARC file, a directory of WARCs or a saved-HTML directory"""
+    if os.path.isfile(path):
+        yield from iter_warc_pages(path)
+        return
+
+    warcs = sorted(
+        name for name in os.listdir(path)
+        if name.endswith(('.warc', '.warc.gz'))
+    )
+    if warcs:
+        for name in warcs:
+            yield from iter_warc_pages(os.path.join(path, name))
+    else:
+        yield from iter_html_dir_pages(path)
+
+
+def _read_headers(f):
+    headers = {}
+    while True:
+        line = f.readline()
+        if not line or line in (b'\r\n', b'\n'):
+            return headers
+        name, _, value = line.decode('utf-8', 'replace').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+
+def _parse_http_response(block):
+    """Return the decoded body of a 200 text/html HTTP response, else None"""
+    head, sep, body = block.partition(b'\r\n\r\n')
+    if not sep:
+        head, sep, body = block.partition(b'\n\n')
+    lines = head.decode('iso-8859-1').splitlines()
+    if not lines:
+        return None
+
+    status = lines[0].split()
+    if len(status) < 2 or status[1] != '200':
+        return None
+
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip().lower()
+
+    if 'html' not in headers.get('content-type', 'text/html'):
+        return None
+
+    try:
+        if 'chunked' in headers.get('transfer-encoding', ''):
+            body = _dechunk(body)
+        encoding = headers.get('content-encoding', '')
+        if encoding in ('gzip', 'x-gzip'):
+            body = gzip.decompress(body)
+        elif encoding == 'deflate':
+            body = zlib.decompress(body)
+    except (ValueError, OSError, zlib.error):
+        return None
+
+    return body
+
+
+def _dechunk(body):
+    chunks = []
+    pos = 0
+    while True:
+        end = body.index(b'\r\n', pos)
+        size = int(body[pos:end].split(b';')[0], 16)
+        if size == 0:
+            return b''.join(chunks)
+        start = end + 2
+        chunks.append(body[start:start + size])
+        pos = start + size + 2
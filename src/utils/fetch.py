@@ -0,0 +1,400 @@
+import os
+import time
+import queue
+import random
+import asyncio
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import requests
+
+# Statuses retried like other 5xx responses; neither opens the host's circuit
+RETRY_STATUSES = frozenset([429, 502, 503, 504])
+
+
+class HostUnavailable(requests.exceptions.ConnectionError):
+    """Raised without making a request while a host's circuit breaker is open"""
+
+
+class _HostState:
+    __slots__ = (
+        'srtt', 'rttvar', 'samples', 'backoff', 'consecutive_failures',
+        'open_until', 'cooldown', 'probing', 'last_error', 'successes',
+        'failures', 'short_circuited', 'times_opened', 'hedges', 'hedge_wins',
+    )
+
+    def __init__(self, cooldown):
+        self.srtt = 0.0
+        self.rttvar = 0.0
+        self.samples = 0
+        self.backoff = 1
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.cooldown = cooldown
+        self.probing = False
+        self.last_error = None
+        self.successes = 0
+        self.failures = 0
+        self.short_circuited = 0
+        self.times_opened = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+
+class HostHealth:
+    """Per-host latency estimates and circuit breakers
+
+    Timeouts follow the TCP retransmission-timeout recipe: a smoothed latency
+    plus four times its mean deviation, doubled after each timeout and
+    clamped between ``min_timeout`` and the caller's ceiling. A host with no
+    history gets the full ceiling. The floor is generous because pages on
+    one host differ widely in cost; a timeout below the caller's ceiling
+    only backs the timeout off and never counts against the host. After
+    ``failure_threshold`` consecutive connection errors or full-ceiling
+    timeouts the host's circuit opens and requests fail fast for a cooldown
+    that doubles every time a half-open probe fails. At most ``max_hosts``
+    hosts are remembered; the least recently used closed-circuit host is
+    forgotten first.
+    """
+
+    def __init__(self, min_timeout=5.0, failure_threshold=3, cooldown=30.0,
+                 max_cooldown=600.0, hedge_min_samples=5, max_hosts=10000, clock=time.monotonic):
+        self.min_timeout = min_timeout
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.hedge_min_samples = hedge_min_samples
+        self.max_hosts = max_hosts
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._hosts = OrderedDict()
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.base_cooldown)
+            if len(self._hosts) > self.max_hosts:
+                self._evict()
+        else:
+            self._hosts.move_to_end(host)
+        return state
+
+    def _evict(self):
+        for host, state in self._hosts.items():
+            if not state.open_until and not state.probing:
+                del self._hosts[host]
+                return
+
+    def timeout_for(self, host, ceiling):
+        """Return the timeout to use for the next request to ``host``"""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None or not state.samples:
+                return ceiling
+            timeout = (state.srtt + 4 * state.rttvar) * state.backoff
+        return min(ceiling, max(self.min_timeout, timeout))
+
+    def hedge_delay(self, host):
+        """Return how long to wait before hedging, or None without enough history"""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None or state.samples < self.hedge_min_samples:
+                return None
+            return max(0.05, state.srtt + 2 * state.rttvar)
+
+    def check(self, host):
+        """Raise HostUnavailable if ``host`` should not be contacted right now
+
+        Returns True when the caller was let through as the half-open probe;
+        it must then call ``end_probe`` once the attempt is over.
+        """
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None or not state.open_until:
+                return False
+            if self.clock() < state.open_until or state.probing:
+                state.short_circuited += 1
+                raise HostUnavailable(f"{host} is failing fast after repeated errors: {state.last_error}")
+            # Cooldown over: let exactly one request through as a probe
+            state.probing = True
+            return True
+
+    def end_probe(self, host):
+        """Release the probe slot if the attempt ended without a verdict"""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is not None:
+                state.probing = False
+
+    def record_success(self, host, elapsed):
+        with self._lock:
+            state = self._state(host)
+            if state.samples:
+                state.rttvar = 0.75 * state.rttvar + 0.25 * abs(state.srtt - elapsed)
+                state.srtt = 0.875 * state.srtt + 0.125 * elapsed
+            else:
+                state.srtt = elapsed
+                state.rttvar = elapsed / 2
+            state.samples += 1
+            state.successes += 1
+            state.backoff = 1
+            state.consecutive_failures = 0
+            state.open_until = 0.0
+            state.probing = False
+            state.cooldown = self.base_cooldown
+
+    def record_failure(self, host, error, timed_out=False, trip=True):
+        """Record a failed request
+
+        Only ``trip`` failures (connection errors, timeouts at the caller's
+        full limit) count towards opening the circuit.
+        """
+        with self._lock:
+            state = self._state(host)
+            state.failures += 1
+            state.last_error = str(error) or type(error).__name__
+            if timed_out:
+                state.backoff = min(state.backoff * 2, 8)
+            if not trip:
+                state.probing = False
+                return
+            state.consecutive_failures += 1
+            if state.probing or state.consecutive_failures >= self.failure_threshold:
+                if state.probing:
+                    state.cooldown = min(state.cooldown * 2, self.max_cooldown)
+                state.open_until = self.clock() + state.cooldown
+                state.probing = False
+                state.times_opened += 1
+
+    def record_hedge(self, host, won):
+        with self._lock:
+            state = self._state(host)
+            state.hedges += 1
+            if won:
+                state.hedge_wins += 1
+
+    def snapshot(self):
+        """Return a JSON-friendly view of every known host"""
+        now = self.clock()
+        with self._lock:
+            hosts = {}
+            for host, state in self._hosts.items():
+                if state.open_until and now < state.open_until:
+                    circuit = 'open'
+                elif state.open_until:
+                    circuit = 'half-open'
+                else:
+                    circuit = 'closed'
+                hosts[host] = {
+                    'circuit': circuit,
+                    'retry_in': round(max(0.0, state.open_until - now), 3) if circuit == 'open' else 0,
+                    'latency': round(state.srtt, 4),
+                    'latency_deviation': round(state.rttvar, 4),
+                    'samples': state.samples,
+                    'timeout_backoff': state.backoff,
+                    'consecutive_failures': state.consecutive_failures,
+                    'successes': state.successes,
+                    'failures': state.failures,
+                    'short_circuited': state.short_circuited,
+                    'times_opened': state.times_opened,
+                    'hedges': state.hedges,
+                    'hedge_wins': state.hedge_wins,
+                    'last_error': state.last_error,
+                }
+            return hosts
+
+
+host_health = HostHealth(
+    min_timeout=float(os.environ.get('LLMS_FETCH_MIN_TIMEOUT', '5')),
+    failure_threshold=int(os.environ.get('LLMS_FETCH_FAILURE_THRESHOLD', '3')),
+    cooldown=float(os.environ.get('LLMS_FETCH_COOLDOWN', '30')),
+    max_hosts=int(os.environ.get('LLMS_FETCH_MAX_HOSTS', '10000')),
+)
+HEDGE_ENABLED = os.environ.get('LLMS_FETCH_HEDGE', '1') != '0'
+
+
+def _backoff_delay(attempt, base=0.25, cap=4.0):
+    """Full-jitter exponential backoff"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def _timed_get(url, headers, timeout):
+    started = time.monotonic()
+    response = requests.get(url, headers=headers, timeout=timeout)
+    return response, time.monotonic() - started
+
+
+def _hedged_get(url, headers, timeout, host, health, delay):
+    """Send a second request if the first has not answered within ``delay``
+
+    Every outcome, including unexpected exceptions, comes back through the
+    queue, and the wait is bounded by ``timeout`` so a stuck request cannot
+    hold the caller.
+    """
+    results = queue.Queue()
+    deadline = time.monotonic() + timeout
+
+    def run(index, request_timeout):
+        try:
+            results.put((index, True, _timed_get(url, headers, request_timeout)))
+        except BaseException as e:
+            results.put((index, False, e))
+
+    def wait(limit):
+        try:
+            return results.get(timeout=max(0.0, limit))
+        except queue.Empty:
+            raise requests.exceptions.Timeout(f"No response from {url} within {timeout:.1f}s") from None
+
+    threading.Thread(target=run, args=(0, timeout), daemon=True).start()
+    outstanding = 1
+    try:
+        index, ok, value = results.get(timeout=delay)
+    except queue.Empty:
+        threading.Thread(target=run, args=(1, max(0.1, timeout - delay)), daemon=True).start()
+        outstanding = 2
+        index, ok, value = wait(deadline - time.monotonic())
+
+    while True:
+        outstanding -= 1
+        if ok:
+            if outstanding or index == 1:
+                health.record_hedge(host, won=index == 1)
+            return value
+        if not outstanding:
+            raise value
+        index, ok, value = wait(deadline - time.monotonic())
+
+
+def fetch(url, headers=None, max_timeout=30, retries=2, hedge=None, health=None):
+    """GET ``url`` with per-host adaptive timeouts, retries and fail-fast
+
+    The whole call, including retries and backoff, is bounded by
+    ``max_timeout``. Returns the last response (callers still call
+    ``raise_for_status``) or raises the last request exception.
+    """
+    health = health or host_health
+    hedge = HEDGE_ENABLED if hedge is None else hedge
+    host = urlsplit(url).netloc.lower()
+    deadline = health.clock() + max_timeout
+    attempt = 0
+
+    while True:
+        probing = health.check(host)
+        try:
+            remaining = deadline - health.clock()
+            if remaining <= 0:
+                raise requests.exceptions.Timeout(f"Gave up on {url} after {max_timeout}s")
+            learned = health.timeout_for(host, max_timeout)
+            timeout = min(learned, remaining)
+            delay = health.hedge_delay(host) if hedge else None
+
+            error = response = None
+            try:
+                if delay is not None and delay < timeout:
+                    response, elapsed = _hedged_get(url, headers, timeout, host, health, delay)
+                else:
+                    response, elapsed = _timed_get(url, headers, timeout)
+            except HostUnavailable:
+                raise
+            except requests.exceptions.RequestException as e:
+                timed_out = isinstance(e, requests.exceptions.Timeout)
+                trip = isinstance(e, requests.exceptions.ConnectionError) or (timed_out and learned >= max_timeout)
+                health.record_failure(host, e, timed_out=timed_out, trip=trip)
+                error = e
+            else:
+                if response.status_code < 500 and response.status_code not in RETRY_STATUSES:
+                    health.record_success(host, elapsed)
+                    return response
+                health.record_failure(host, f"HTTP {response.status_code}", trip=False)
+        finally:
+            if probing:
+                health.end_probe(host)
+
+        attempt += 1
+        remaining = deadline - health.clock()
+        if attempt > retries or remaining <= 0:
+            if error is not None:
+                raise error
+            return response
+        time.sleep(min(_backoff_delay(attempt), remaining))
+
+
+async def async_fetch(client, url, headers=None, max_timeout=30, retries=2, hedge=None, health=None):
+    """asyncio counterpart of ``fetch`` for an ``httpx.AsyncClient``
+
+    The losing request of a hedged pair is cancelled rather than left to run.
+    """
+    import httpx
+
+    health = health or host_health
+    hedge = HEDGE_ENABLED if hedge is None else hedge
+    host = urlsplit(url).netloc.lower()
+    deadline = health.clock() + max_timeout
+    attempt = 0
+
+    async def timed_get(request_timeout):
+        started = time.monotonic()
+        response = await client.get(url, headers=headers, timeout=request_timeout)
+        return response, time.monotonic() - started
+
+    async def hedged_get(timeout, delay):
+        first = asyncio.ensure_future(timed_get(timeout))
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+        second = asyncio.ensure_future(timed_get(max(0.1, timeout - delay)))
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        health.record_hedge(host, won=task is second)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    while True:
+        probing = health.check(host)
+        try:
+            remaining = deadline - health.clock()
+            if remaining <= 0:
+                raise httpx.TimeoutException(f"Gave up on {url} after {max_timeout}s")
+            learned = health.timeout_for(host, max_timeout)
+            timeout = min(learned, remaining)
+            delay = health.hedge_delay(host) if hedge else None
+
+            error = response = None
+            try:
+                if delay is not None and delay < timeout:
+                    response, elapsed = await hedged_get(timeout, delay)
+                else:
+                    response, elapsed = await timed_get(timeout)
+            except httpx.HTTPError as e:
+                timed_out = isinstance(e, httpx.TimeoutException)
+                trip = (isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                        or (timed_out and learned >= max_timeout))
+                health.record_failure(host, e, timed_out=timed_out, trip=trip)
+                error = e
+            else:
+                if response.status_code < 500 and response.status_code not in RETRY_STATUSES:
+                    health.record_success(host, elapsed)
+                    return response
+                health.record_failure(host, f"HTTP {response.status_code}", trip=False)
+        finally:
+            if probing:
+                health.end_probe(host)
+
+        attempt += 1
+        remaining = deadline - health.clock()
+        if attempt > retries or remaining <= 0:
+            if error is not None:
+                raise error
+            return response
+        await asyncio.sleep(min(_backoff_delay(attempt), remaining))
@@ -0,0 +1,211 @@
+import os
+import math
+import mmap
+import sqlite3
+import hashlib
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over an mmap'd bit array
+
+    Sized for ``capacity`` items at ``error_rate`` false positives. With a
+    ``path`` the bits live in that file and survive restarts; without one an
+    anonymous mapping is used.
+    """
+
+    def __init__(self, capacity, error_rate=0.001, path=None):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error_rate between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.num_bytes = (self.num_bits + 7) // 8
+        self.path = path
+
+        if path:
+            self._file = open(path, 'a+b')
+            if os.path.getsize(path) < self.num_bytes:
+                self._file.truncate(self.num_bytes)
+            self._bits = mmap.mmap(self._file.fileno(), self.num_bytes)
+        else:
+            self._file = None
+            self._bits = mmap.mmap(-1, self.num_bytes)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def add(self, item):
+        """Add ``item``; return True if it was (probably) not present before"""
+        bits = self._bits
+        added = False
+        for pos in self._positions(item):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            value = bits[byte]
+            if not value & mask:
+                bits[byte] = value | mask
+                added = True
+        return added
+
+    def __contains__(self, item):
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def flush(self):
+        if self._file is not None:
+            self._bits.flush()
+
+    def close(self):
+        self.flush()
+        self._bits.close()
+        if self._file is not None:
+            self._file.close()
+
+
+class CrawlFrontier:
+    """Disk-backed, resumable crawl frontier with a Bloom filter seen-set
+
+    Pending URLs live in SQLite ordered by depth (shallowest first) then rank
+    (highest first), so memory stays bounded by the SQLite page cache plus
+    the fixed-size Bloom filter regardless of how many URLs are queued.
+    ``pop`` only leases URLs; they stay in the database until ``done`` is
+    called for them. Reopening the same ``db_path`` resumes where a previous
+    process stopped, re-queueing every URL it had popped but not finished.
+    """
+
+    def __init__(self, db_path, capacity=10_000_000, error_rate=0.001, cache_kib=8192):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA cache_size=-{int(cache_kib)}")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                rank REAL NOT NULL,
+                leased INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(frontier)")]
+        if 'leased' not in columns:
+            self._conn.execute("ALTER TABLE frontier ADD COLUMN leased INTEGER NOT NULL DEFAULT 0")
+        self._conn.executescript("""
+            DROP INDEX IF EXISTS frontier_priority;
+            CREATE INDEX IF NOT EXISTS frontier_pending ON frontier (depth, rank DESC, id) WHERE leased = 0;
+            CREATE INDEX IF NOT EXISTS frontier_leased ON frontier (url) WHERE leased = 1;
+        """)
+
+        # Whatever a previous process popped but never finished goes back in the queue
+        self.requeued = self._conn.execute("UPDATE frontier SET leased = 0 WHERE leased = 1").rowcount
+        self._conn.commit()
+
+        # The Bloom filter's geometry is fixed when the frontier is created
+        stored = dict(self._conn.execute("SELECT key, value FROM meta"))
+        if stored:
+            capacity = int(stored['capacity'])
+            error_rate = float(stored['error_rate'])
+            self.seen_count = int(stored['seen_count'])
+        else:
+            self.seen_count = 0
+            self._conn.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)",
+                [('capacity', str(capacity)), ('error_rate', repr(error_rate)), ('seen_count', '0')],
+            )
+            self._conn.commit()
+
+        self.cache_kib = cache_kib
+        self.seen = BloomFilter(capacity, error_rate, path=db_path + '.bloom')
+
+    def push(self, url, depth=0, rank=0.0):
+        """Enqueue ``url`` unless it has (probably) been seen; return whether it was added"""
+        return self.push_many([(url, depth, rank)]) == 1
+
+    def push_many(self, items):
+        """Enqueue ``(url, depth, rank)`` tuples in one transaction; return the number added"""
+        rows = []
+        batch = set()
+        for url, depth, rank in items:
+            if url not in batch and url not in self.seen:
+                batch.add(url)
+                rows.append((url, depth, rank))
+        if rows:
+            self._conn.executemany("INSERT INTO frontier (url, depth, rank) VALUES (?, ?, ?)", rows)
+            self._conn.execute("UPDATE meta SET value = ? WHERE key = 'seen_count'",
+                               (str(self.seen_count + len(rows)),))
+            self._conn.commit()
+            self.seen_count += len(rows)
+            # The filter lives in a shared mapping whose dirty pages survive a
+            # crash, so its bits are only set once the rows are committed: a
+            # crash in between can make a URL be queued twice, never lost.
+            for url in batch:
+                self.seen.add(url)
+            self.seen.flush()
+        return len(rows)
+
+    def push_links(self, links, depth):
+        """Enqueue links extracted from a page at ``depth``, ranked by page order"""
+        total = len(links)
+        return self.push_many(
+            (url, depth + 1, (total - i) / total)
+            for i, url in enumerate(link.url for link in links)
+            if url
+        )
+
+    def pop(self, count=1):
+        """Lease up to ``count`` highest-priority ``(url, depth, rank)`` tuples
+
+        Call ``done`` once each URL has been crawled; leased URLs that are
+        never finished are handed out again after the frontier is reopened.
+        """
+        rows = self._conn.execute(
+            "SELECT id, url, depth, rank FROM frontier WHERE leased = 0 ORDER BY depth, rank DESC, id LIMIT ?",
+            (count,),
+        ).fetchall()
+        if rows:
+            self._conn.executemany("UPDATE frontier SET leased = 1 WHERE id = ?", [(row[0],) for row in rows])
+            self._conn.commit()
+        return [row[1:] for row in rows]
+
+    def done(self, *urls):
+        """Remove leased ``urls`` for good once they have been crawled"""
+        if urls:
+            self._conn.executemany("DELETE FROM frontier WHERE leased = 1 AND url = ?", [(url,) for url in urls])
+            self._conn.commit()
+
+    def in_progress(self):
+        """Number of URLs popped but not yet marked done"""
+        return self._conn.execute("SELECT COUNT(*) FROM frontier WHERE leased = 1").fetchone()[0]
+
+    def __contains__(self, url):
+        return url in self.seen
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM frontier WHERE leased = 0").fetchone()[0]
+
+    def memory_stats(self):
+        """Report the bounded memory footprint and its cost per million URLs"""
+        bloom_bytes = self.seen.num_bytes
+        cache_bytes = self.cache_kib * 1024
+        return {
+            'seen_urls': self.seen_count,
+            'pending_urls': len(self),
+            'in_progress_urls': self.in_progress(),
+            'bloom_capacity': self.seen.capacity,
+            'bloom_error_rate': self.seen.error_rate,
+            'bloom_bytes': bloom_bytes,
+            'bloom_bytes_per_million_urls': bloom_bytes * 1_000_000 // self.seen.capacity,
+            'sqlite_cache_bytes': cache_bytes,
+            'bloom_fill_ratio': min(1.0, self.seen_count / self.seen.capacity),
+        }
+
+    def close(self):
+        self._conn.commit()
+        self.seen.close()
+        self._conn.close()
@@ -0,0 +1,73 @@
+import sys
+
+
+class Link:
+    """Compact record for an extracted link
+
+    Replaces the per-link ``{'text', 'url', 'context'}`` dicts. The URL is
+    stored split into an interned origin (``scheme://host``), an interned
+    directory prefix and the remaining tail, so the thousands of links on a
+    large site share one copy of each host and path prefix. Contexts are
+    interned as well since sibling links usually share the same parent text.
+    Every read of ``url`` joins the parts again, so hot paths should read it
+    once per link.
+    """
+
+    __slots__ = ('text', 'context', '_origin', '_prefix', '_tail')
+
+    def __init__(self, text, url, context=None):
+        self.text = text
+        self.context = sys.intern(context) if context else context
+        self.url = url
+
+    @property
+    def url(self):
+        return self._origin + self._prefix + self._tail
+
+    @url.setter
+    def url(self, url):
+        authority = url.find('://')
+        path_start = url.find('/', authority + 3 if authority >= 0 else 0)
+        if path_start < 0:
+            self._origin, self._prefix, self._tail = sys.intern(url), '', ''
+            return
+        origin, rest = url[:path_start], url[path_start:]
+        slash = rest.rfind('/', 0, rest.find('?') if '?' in rest else len(rest))
+        self._origin = sys.intern(origin)
+        self._prefix = sys.intern(rest[:slash + 1])
+        self._tail = rest[slash + 1:]
+
+    def to_dict(self):
+        # Called once per link when encoding JSON; join without the property
+        context = self.context
+        if context is None:
+            return {'text': self.text, 'url': self._origin + self._prefix + self._tail}
+        return {'text': self.text, 'url': self._origin + self._prefix + self._tail, 'context': context}
+
+    def __getstate__(self):
+        return (self.text, self.url, self.context)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def _key(self):
+        # The split is a function of the URL, so comparing parts compares URLs
+        return (self.text, self._origin, self._prefix, self._tail, self.context)
+
+    def __eq__(self, other):
+        if not isinstance(other, Link):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f'<Link {self.text!r} {self.url}>'
+
+
+def json_default(obj):
+    """``default`` hook for json encoders that serializes Link records"""
+    if isinstance(obj, Link):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
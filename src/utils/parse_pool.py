@@ -0,0 +1,173 @@
+import os
+import time
+import asyncio
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+_local = threading.local()
+
+
+def run_local(generator, method, content):
+    """Call ``generator.method(content)`` in this process, bypassing the pool"""
+    _local.inside = True
+    try:
+        return getattr(generator, method)(content)
+    finally:
+        _local.inside = False
+
+
+def disable_parse_pool():
+    """Parse in-process from now on; used in worker processes to avoid nested pools"""
+    parse_pool.processes = 0
+
+
+def _init_worker():
+    disable_parse_pool()
+    import src.routes.llms_generator  # noqa: F401
+    import src.routes.enhanced_llms_generator  # noqa: F401
+
+
+def _parse_task(cls, url, method, shm_name, size):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # BeautifulSoup wants bytes, so this is the one copy the page makes
+        content = bytes(shm.buf[:size])
+    finally:
+        shm.close()
+    generator = cls(url)
+    success = run_local(generator, method, content)
+    return success, vars(generator)
+
+
+def _release(shm):
+    shm.close()
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class ParsePool:
+    """Persistent process pool for the CPU-bound parse and extract phase
+
+    The page body is placed in a shared memory block rather than pickled
+    through the executor's pipe; the worker rebuilds the generator, runs the
+    requested analysis method and sends back only the generator's state
+    (site data with compact Link records, analysis steps, score). Workers are
+    started with forkserver so forking never happens from a process that is
+    already running request threads. If the pool breaks, the error is
+    reported, the analysis falls back to running in the calling thread and
+    parsing stays in-process for ``retry_delay`` seconds (doubling while the
+    pool keeps breaking, up to ``max_retry_delay``) before a fresh pool is
+    started.
+    """
+
+    def __init__(self, processes=0, retry_delay=5.0, max_retry_delay=300.0):
+        self.processes = processes
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._executor = None
+        self._lock = threading.Lock()
+        self._breaks = 0
+        self._retry_at = 0.0
+
+    @property
+    def enabled(self):
+        return (
+            self.processes > 0
+            and not getattr(_local, 'inside', False)
+            and time.monotonic() >= self._retry_at
+        )
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if time.monotonic() < self._retry_at:
+                    return None
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes, mp_context=context, initializer=_init_worker
+                )
+            return self._executor
+
+    def _discard(self, executor, error):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self._breaks += 1
+                delay = min(self.max_retry_delay, self.retry_delay * 2 ** (self._breaks - 1))
+                self._retry_at = time.monotonic() + delay
+                print(f"Error in parse pool, parsing in-process for {delay:.0f}s: {str(error) or type(error).__name__}")
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _succeeded(self):
+        if self._breaks:
+            with self._lock:
+                self._breaks = 0
+
+    def _submit(self, generator, method, content):
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        executor = self._get_executor()
+        if executor is None:
+            return None
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(content)))
+        shm.buf[:len(content)] = content
+        try:
+            future = executor.submit(_parse_task, type(generator), generator.url, method, shm.name, len(content))
+        except BrokenProcessPool as e:
+            _release(shm)
+            self._discard(executor, e)
+            return None
+        except BaseException:
+            _release(shm)
+            raise
+        return executor, future, shm
+
+    def analyze(self, generator, method, content):
+        """Run ``generator.method(content)`` in a worker and copy its state back"""
+        submitted = self._submit(generator, method, content)
+        if submitted is None:
+            return run_local(generator, method, content)
+        executor, future, shm = submitted
+        try:
+            success, state = future.result()
+        except BrokenProcessPool as e:
+            self._discard(executor, e)
+            return run_local(generator, method, content)
+        finally:
+            _release(shm)
+        self._succeeded()
+        generator.__dict__.update(state)
+        return success
+
+    async def analyze_async(self, generator, method, content):
+        """asyncio counterpart of ``analyze`` that does not hold a thread while waiting"""
+        loop = asyncio.get_running_loop()
+        submitted = self._submit(generator, method, content)
+        if submitted is None:
+            return await loop.run_in_executor(None, run_local, generator, method, content)
+        executor, future, shm = submitted
+        try:
+            success, state = await asyncio.wrap_future(future)
+        except BrokenProcessPool as e:
+            self._discard(executor, e)
+            return await loop.run_in_executor(None, run_local, generator, method, content)
+        finally:
+            _release(shm)
+        self._succeeded()
+        generator.__dict__.update(state)
+        return success
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+parse_pool = ParsePool(processes=int(os.environ.get('LLMS_PARSE_POOL_SIZE', '0')))
@@ -0,0 +1,291 @@
+import math
+import time
+import heapq
+import bisect
+import threading
+
+
+def estimate_change_rate(intervals, changed, observed):
+    """Estimate a Poisson change rate from periodic visits
+
+    Uses Cho & Garcia-Molina's bias-reduced estimator: with ``intervals``
+    visits spanning ``observed`` seconds, of which ``changed`` saw a change,
+    ``-log((n - X + 0.5) / (n + 0.5)) / mean_interval``. Unlike a plain
+    ``changes / time`` ratio it does not saturate when most visits see a
+    change.
+    """
+    if intervals <= 0 or observed <= 0:
+        return None
+    if not changed:
+        return 0.0
+    ratio = (intervals - changed + 0.5) / (intervals + 0.5)
+    return -math.log(ratio) / (observed / intervals)
+
+
+# A site changing at rate r and visited at rate f is fresh a fraction
+# (f / r) * (1 - exp(-r / f)) of the time. The marginal freshness of one more
+# visit per second is h(x) / r with x = r / f and h(x) = 1 - (1 + x) e^-x,
+# which increases from 0 to 1; this table inverts it.
+_GAIN_X = [1e-4 * 1.005 ** i for i in range(2400)]
+_GAIN_H = [1 - (1 + x) * math.exp(-x) for x in _GAIN_X]
+
+
+def _inverse_gain(y):
+    """Return x with h(x) = y for 0 <= y < 1"""
+    if y <= _GAIN_H[0]:
+        return math.sqrt(2 * y)  # h(x) ~ x^2 / 2 near zero
+    i = bisect.bisect_left(_GAIN_H, y)
+    if i >= len(_GAIN_H):
+        return _GAIN_X[-1]
+    h0, h1 = _GAIN_H[i - 1], _GAIN_H[i]
+    return _GAIN_X[i - 1] + (_GAIN_X[i] - _GAIN_X[i - 1]) * (y - h0) / (h1 - h0)
+
+
+class SiteSchedule:
+    """Revisit history and next due time for one tracked site"""
+
+    __slots__ = (
+        'key', 'url', 'mode', 'visits', 'intervals', 'changed_intervals',
+        'observed', 'last_visit', 'next_visit', 'content_hash', 'links_hash',
+        'content_changes', 'links_changes', 'failures', 'interval',
+    )
+
+    def __init__(self, url, mode, next_visit):
+        self.key = (url, mode)
+        self.url = url
+        self.mode = mode
+        self.visits = 0
+        self.intervals = 0
+        self.changed_intervals = 0
+        self.observed = 0.0
+        self.last_visit = None
+        self.next_visit = next_visit
+        self.content_hash = None
+        self.links_hash = None
+        self.content_changes = 0
+        self.links_changes = 0
+        self.failures = 0
+        self.interval = None
+
+    @property
+    def change_rate(self):
+        return estimate_change_rate(self.intervals, self.changed_intervals, self.observed)
+
+    def to_dict(self):
+        rate = self.change_rate
+        return {
+            'url': self.url,
+            'mode': self.mode,
+            'visits': self.visits,
+            'content_changes': self.content_changes,
+            'links_changes': self.links_changes,
+            'change_rate_per_day': round(rate * 86400, 4) if rate is not None else None,
+            'interval_seconds': round(self.interval, 1) if self.interval else None,
+            'last_visit': self.last_visit,
+            'next_visit': self.next_visit,
+            'failures': self.failures,
+        }
+
+
+class RefreshScheduler:
+    """Priority-queue scheduler that spends a fetch budget where sites change
+
+    Revisit rates follow Cho & Garcia-Molina's freshness-optimal allocation:
+    every site gets the visit rate at which one more visit per second buys
+    the same freshness, with that marginal value chosen so all rates sum to
+    ``fetch_rate``. Sites that change too often to keep fresh get fewer
+    visits than a proportional policy would give them, and no site is
+    visited more than ``max_visits_per_change`` times per expected change, so
+    static sites fall back towards ``max_interval``. A token bucket enforces
+    the budget on top and the most overdue sites are served first. All times
+    come from ``clock`` (or an explicit ``now``), so the scheduler can be
+    driven by a simulated clock.
+    """
+
+    def __init__(self, fetch_rate=1.0, burst=5, min_interval=900, max_interval=7 * 86400,
+                 initial_interval=86400, max_visits_per_change=10.0, clock=time.time):
+        self.fetch_rate = fetch_rate
+        self.burst = burst
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.initial_interval = initial_interval
+        self.max_visits_per_change = max_visits_per_change
+        self.clock = clock
+        self._lock = threading.RLock()
+        self._sites = {}
+        self._heap = []
+        self._sequence = 0
+        self._tokens = float(burst)
+        self._tokens_at = None
+        self._mu = 0.0
+        self._stale_plan = 0
+
+    def add(self, url, mode='advanced', next_visit=None, now=None):
+        """Track a site; new sites are due immediately unless ``next_visit`` is given"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            key = (url, mode)
+            site = self._sites.get(key)
+            if site is None:
+                site = self._sites[key] = SiteSchedule(url, mode, now if next_visit is None else next_visit)
+                site.interval = self.initial_interval
+                self._push(site)
+                self._stale_plan = len(self._sites)
+            return site
+
+    def restore(self, site):
+        """Track a site rebuilt from persisted history"""
+        with self._lock:
+            self._sites[site.key] = site
+            site.interval = 1.0 / self._frequency(self._rate(site), self._mu)
+            self._push(site)
+            self._stale_plan = len(self._sites)
+
+    def remove(self, url, mode='advanced'):
+        with self._lock:
+            site = self._sites.pop((url, mode), None)
+            self._stale_plan = len(self._sites)
+            return site
+
+    def get(self, url, mode='advanced'):
+        return self._sites.get((url, mode))
+
+    def record(self, site, content_hash, links_hash, now=None):
+        """Record a completed visit and schedule the next one
+
+        Returns ``(content_changed, links_changed)``.
+        """
+        now = self.clock() if now is None else now
+        with self._lock:
+            content_changed = site.content_hash is not None and content_hash != site.content_hash
+            links_changed = site.links_hash is not None and links_hash != site.links_hash
+
+            if site.last_visit is not None:
+                site.intervals += 1
+                site.observed += max(0.0, now - site.last_visit)
+                if content_changed or links_changed:
+                    site.changed_intervals += 1
+            site.visits += 1
+            site.content_changes += content_changed
+            site.links_changes += links_changed
+            site.content_hash = content_hash
+            site.links_hash = links_hash
+            site.last_visit = now
+            site.failures = 0
+
+            # Re-solving the allocation is O(n); do it once per ~10% of sites
+            self._stale_plan += 1
+            if self._stale_plan > len(self._sites) // 10:
+                self._plan()
+            site.interval = 1.0 / self._frequency(self._rate(site), self._mu)
+            site.next_visit = now + site.interval
+            self._push(site)
+            return content_changed, links_changed
+
+    def record_failure(self, site, now=None):
+        """Back off exponentially from a site that could not be refreshed"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            site.failures += 1
+            backoff = min(self.max_interval, self.min_interval * 2 ** (site.failures - 1))
+            site.next_visit = now + backoff
+            self._push(site)
+
+    def planned_fetch_rate(self):
+        """Sum of the planned revisit rates (fetches per second)"""
+        with self._lock:
+            return sum(1.0 / site.interval for site in self._sites.values())
+
+    def pop_due(self, now=None, limit=None):
+        """Remove and return due sites, most overdue first, within the fetch budget"""
+        now = self.clock() if now is None else now
+        due = []
+        with self._lock:
+            self._refill(now)
+            while self._heap and (limit is None or len(due) < limit):
+                next_visit, _, key = self._heap[0]
+                site = self._sites.get(key)
+                if site is None or site.next_visit != next_visit:
+                    heapq.heappop(self._heap)  # stale entry
+                    continue
+                if next_visit > now or self._tokens < 1:
+                    break
+                heapq.heappop(self._heap)
+                self._tokens -= 1
+                site.next_visit = None
+                due.append(site)
+        return due
+
+    def seconds_until_next(self, now=None):
+        """Seconds until the next site is due and a fetch token is available"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            while self._heap:
+                next_visit, _, key = self._heap[0]
+                site = self._sites.get(key)
+                if site is not None and site.next_visit == next_visit:
+                    break
+                heapq.heappop(self._heap)
+            if not self._heap:
+                return None
+            self._refill(now)
+            wait_for_token = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.fetch_rate
+            return max(0.0, self._heap[0][0] - now, wait_for_token)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'sites': [site.to_dict() for site in self._sites.values()],
+                'fetch_rate': self.fetch_rate,
+                'planned_fetch_rate': round(self.planned_fetch_rate(), 6),
+            }
+
+    def __len__(self):
+        return len(self._sites)
+
+    def _rate(self, site):
+        # Until a change is seen, assume half a change over the time watched
+        # so far plus one initial interval; quiet sites back off gradually.
+        prior = 0.5 / (site.observed + self.initial_interval)
+        rate = site.change_rate
+        return prior if rate is None else max(rate, prior)
+
+    def _frequency(self, rate, mu):
+        """Optimal visit rate for a site changing at ``rate`` given marginal value ``mu``"""
+        low = 1.0 / self.max_interval
+        high = min(1.0 / self.min_interval, self.max_visits_per_change * rate)
+        if high <= low or rate * mu >= 1:
+            return low
+        x = _inverse_gain(rate * mu)
+        if x <= 0:
+            return high
+        return min(high, max(low, rate / x))
+
+    def _plan(self):
+        """Solve for the marginal value at which visit rates use the whole budget"""
+        self._stale_plan = 0
+        rates = [self._rate(site) for site in self._sites.values()]
+        if not rates or sum(self._frequency(r, 0.0) for r in rates) <= self.fetch_rate:
+            self._mu = 0.0
+            return
+        # Total visit rate falls as mu grows; mu = 1 / min(rate) leaves every
+        # site at max_interval.
+        lo, hi = math.log(1e-3 / max(rates)), math.log(1.0 / min(rates))
+        for _ in range(40):
+            mid = (lo + hi) / 2
+            if sum(self._frequency(r, math.exp(mid)) for r in rates) > self.fetch_rate:
+                lo = mid
+            else:
+                hi = mid
+        self._mu = math.exp(hi)
+
+    def _push(self, site):
+        self._sequence += 1
+        heapq.heappush(self._heap, (site.next_visit, self._sequence, site.key))
+
+    def _refill(self, now):
+        if self._tokens_at is None:
+            self._tokens_at = now
+        elapsed = max(0.0, now - self._tokens_at)
+        self._tokens = min(float(self.burst), self._tokens + elapsed * self.fetch_rate)
+        self._tokens_at = now
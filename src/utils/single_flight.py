@@ -0,0 +1,267 @@
+import os
+import time
+import asyncio
+import pickle
+import hashlib
+import tempfile
+import threading
+
+from src.utils.url_canon import canonicalize_url
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+
+class _Call:
+    """A single in-flight analysis that other callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    Within a process, threads asking for a key that is already being computed
+    block until the first caller (the leader) finishes and then receive its
+    result, or its exception. When ``lock_dir`` is set, leaders in different
+    worker processes also coordinate through a per-key file lock, and the
+    result is handed over as a pickle next to the lock file.
+
+    Result pickles are unpickled by every worker, so ``lock_dir`` must be
+    private to the service user; it is created with mode 0700. Results older
+    than ``result_ttl`` are deleted when read, and each process sweeps stale
+    lock and result files at most once per ``result_ttl``.
+    """
+
+    def __init__(self, lock_dir=None, result_ttl=30):
+        self.lock_dir = lock_dir
+        self.result_ttl = result_ttl
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {
+            'executed': 0,
+            'coalesced': 0,
+            'coalesced_across_workers': 0,
+            'errors': 0,
+        }
+        self._last_sweep = 0.0
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, mode=0o700, exist_ok=True)
+
+    def do(self, key, fn):
+        """Run ``fn`` once for all concurrent callers of ``key``"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats['coalesced'] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            if self.lock_dir and fcntl is not None:
+                call.result = self._do_across_workers(key, fn)
+            else:
+                call.result = self._execute(fn)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        return call.result
+
+    def stats(self):
+        """Return coalescing counters and current in-flight state"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+            stats['waiting'] = sum(call.waiters for call in self._calls.values())
+        stats['cross_worker'] = bool(self.lock_dir and fcntl is not None)
+        return stats
+
+    def _execute(self, fn):
+        with self._lock:
+            self._stats['executed'] += 1
+        try:
+            return fn()
+        except BaseException:
+            with self._lock:
+                self._stats['errors'] += 1
+            raise
+
+    def _do_across_workers(self, key, fn):
+        """Coordinate with other worker processes through a file lock"""
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        lock_path = os.path.join(self.lock_dir, f"{digest}.lock")
+        result_path = os.path.join(self.lock_dir, f"{digest}.result")
+        requested_at = time.time()
+        if requested_at - self._last_sweep > self.result_ttl:
+            self._last_sweep = requested_at
+            self.sweep()
+
+        with open(lock_path, 'a+b') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another worker is analyzing this key; wait for it and reuse
+                # its result if it finished after we asked.
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                shared = self._read_result(result_path, requested_at)
+                if shared is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                    with self._lock:
+                        self._stats['coalesced_across_workers'] += 1
+                    ok, value = shared
+                    if not ok:
+                        raise value
+                    return value
+
+            try:
+                try:
+                    value = self._execute(fn)
+                except Exception as e:
+                    self._write_result(result_path, (False, e))
+                    raise
+                self._write_result(result_path, (True, value))
+                return value
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_result(self, result_path, requested_at):
+        try:
+            with open(result_path, 'rb') as f:
+                finished_at, payload = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if time.time() - finished_at > self.result_ttl:
+            try:
+                os.unlink(result_path)
+            except OSError:
+                pass
+            return None
+        if finished_at < requested_at:
+            return None
+        return payload
+
+    def sweep(self):
+        """Delete result and idle lock files older than ``result_ttl``"""
+        if not self.lock_dir or fcntl is None:
+            return
+        cutoff = time.time() - self.result_ttl
+        try:
+            names = os.listdir(self.lock_dir)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.lock_dir, name)
+            try:
+                if os.stat(path).st_mtime > cutoff:
+                    continue
+                if name.endswith(('.result', '.tmp')):
+                    os.unlink(path)
+                elif name.endswith('.lock'):
+                    # Only remove locks nobody holds. A worker that opened
+                    # the old file just before the unlink may run the key a
+                    # second time, which is harmless.
+                    with open(path, 'a+b') as lock_file:
+                        try:
+                            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        except BlockingIOError:
+                            continue
+                        os.unlink(path)
+            except OSError:
+                continue
+
+    def _write_result(self, result_path, payload):
+        try:
+            data = pickle.dumps((time.time(), payload))
+        except Exception:
+            ok, value = payload
+            if ok:
+                return
+            data = pickle.dumps((time.time(), (False, RuntimeError(str(value)))))
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.lock_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, result_path)
+        except OSError as e:
+            print(f"Error sharing coalesced result: {str(e)}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of SingleFlight used by the ASGI serving path
+
+    Only coalesces within one event loop; each ASGI worker keeps its own.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._stats = {
+            'executed': 0,
+            'coalesced': 0,
+            'errors': 0,
+        }
+
+    async def do(self, key, coro_fn):
+        """Await ``coro_fn()`` once for all concurrent callers of ``key``
+
+        The work runs as its own task, so cancelling any caller, including
+        the one that started it, leaves the others waiting on the result.
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self._stats['coalesced'] += 1
+        else:
+            task = asyncio.create_task(coro_fn())
+            self._calls[key] = task
+            self._stats['executed'] += 1
+            task.add_done_callback(lambda t: self._finish(key, t))
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieve the outcome even if every caller was cancelled
+        if not task.cancelled() and task.exception() is not None:
+            self._stats['errors'] += 1
+
+    def stats(self):
+        """Return coalescing counters and current in-flight state"""
+        stats = dict(self._stats)
+        stats['in_flight'] = len(self._calls)
+        return stats
+
+
+def coalesce_key(url, mode):
+    """Build the coalescing key for an analysis of ``url`` in ``mode``"""
+    return (mode, canonicalize_url(url))
+
+
+# Shared by both generator blueprints so a URL analyzed by either is coalesced
+# per mode. Set LLMS_COALESCE_LOCK_DIR to a directory private to the service
+# user to also coalesce across gunicorn workers.
+analysis_flight = SingleFlight(lock_dir=os.environ.get('LLMS_COALESCE_LOCK_DIR'))
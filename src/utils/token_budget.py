@@ -0,0 +1,193 @@
+import re
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding('cl100k_base')
+except Exception:
+    _ENCODING = None
+
+# Calibrated against cl100k_base on English web copy: one token per word or
+# punctuation mark, plus roughly one more for every long word that the BPE
+# splits.
+_PIECES = re.compile(r"\w+|[^\w\s]")
+_LONG_WORDS = re.compile(r"\w{9,}")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text):
+    """Estimate the token count of ``text``; exact when tiktoken is installed"""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode_ordinary(text))
+    return len(_PIECES.findall(text)) + len(_LONG_WORDS.findall(text))
+
+
+class Section:
+    """A candidate block of llms-full.txt output"""
+
+    __slots__ = (
+        'group', 'text', 'importance', 'order', 'required', 'truncatable',
+        'compact', 'tokens', 'truncated',
+    )
+
+    def __init__(self, group, text, importance, order, required=False, truncatable=True, compact=False):
+        self.group = group
+        self.text = text
+        self.importance = importance
+        self.order = order
+        self.required = required
+        self.truncatable = truncatable
+        self.compact = compact
+        # One extra token for the blank line that separates sections
+        self.tokens = estimate_tokens(text) + 1
+        self.truncated = False
+
+
+def split_chunks(text, max_chars=1200):
+    """Split page text into chunks of whole sentences of at most ``max_chars``"""
+    chunks = []
+    current = ''
+    for sentence in _SENTENCE_END.split(text):
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            chunks.append(current)
+            current = ''
+        current = f"{current} {sentence}" if current else sentence
+        while len(current) > max_chars:
+            chunks.append(current[:max_chars])
+            current = current[max_chars:]
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _truncate(section, tokens):
+    """Cut a section down to roughly ``tokens`` tokens at a word boundary"""
+    chars_per_token = len(section.text) / max(1, section.tokens)
+    cut = section.text[:int(tokens * chars_per_token)]
+    if ' ' in cut:
+        cut = cut[:cut.rfind(' ')]
+    truncated = Section(section.group, cut.rstrip() + ' ...', section.importance, section.order,
+                        section.required, truncatable=False, compact=section.compact)
+    truncated.truncated = True
+    return truncated
+
+
+def _fill(candidates, remaining):
+    taken = []
+    skipped = []
+    for section in candidates:
+        if section.tokens <= remaining:
+            taken.append(section)
+            remaining -= section.tokens
+        else:
+            skipped.append(section)
+    return taken, skipped, remaining
+
+
+def select_sections(sections, budget, min_truncated_tokens=40):
+    """Choose which sections to keep within ``budget`` tokens
+
+    Required sections are always kept. The rest are taken greedily by
+    importance per token, checked against seeding the fill with the single
+    most important section that fits (the classic 1/2-approximation for
+    0/1 knapsack); the best leftover candidate is then truncated to use the
+    remaining budget. Runs in O(n log n) over the candidates.
+    """
+    required = [s for s in sections if s.required]
+    budget_left = budget - sum(s.tokens for s in required)
+
+    candidates = sorted(
+        (s for s in sections if not s.required and s.tokens),
+        key=lambda s: s.importance / s.tokens,
+        reverse=True,
+    )
+    taken, skipped, remaining = _fill(candidates, budget_left)
+
+    best_single = max(
+        (s for s in skipped if s.tokens <= budget_left),
+        key=lambda s: s.importance, default=None,
+    )
+    if best_single is not None:
+        seeded = [best_single] + [s for s in candidates if s is not best_single]
+        alt_taken, alt_skipped, alt_remaining = _fill(seeded, budget_left)
+        if sum(s.importance for s in alt_taken) > sum(s.importance for s in taken):
+            taken, skipped, remaining = alt_taken, alt_skipped, alt_remaining
+
+    if remaining >= min_truncated_tokens:
+        for section in sorted(skipped, key=lambda s: s.importance, reverse=True):
+            if section.truncatable:
+                taken.append(_truncate(section, remaining - 1))
+                break
+
+    return sorted(required + taken, key=lambda s: s.order)
+
+
+def render_sections(sections):
+    """Render selected sections under their group headings, in document order
+
+    Consecutive list items (``compact`` sections) of a group share one block.
+    """
+    content = []
+    group = None
+    previous = None
+    for section in sections:
+        if section.group != group:
+            group = section.group
+            if content:
+                content.append("")
+            if group:
+                content.append(f"## {group}")
+                content.append("")
+        elif content and not (section.compact and previous.compact):
+            content.append("")
+        content.append(section.text)
+        previous = section
+    content.append("")
+    return "\n".join(content)
+
+
+def _heading_tokens(sections, heading_costs):
+    tokens = 0
+    group = None
+    for section in sections:
+        if section.group != group:
+            group = section.group
+            tokens += heading_costs.get(group, 0)
+    return tokens
+
+
+def assemble(sections, budget):
+    """Select and render sections so the full text fits ``budget`` tokens
+
+    Returns the text, its estimated token count and the selected sections.
+    """
+    heading_costs = {
+        group: estimate_tokens(f"## {group}") + 1
+        for group in {s.group for s in sections if s.group}
+    }
+    overhead = sum(heading_costs.values())
+    selected = select_sections(sections, budget - overhead)
+
+    # A group split up by document order repeats its heading; if that
+    # pushes the total over budget, shed the least valuable sections.
+    total = sum(s.tokens for s in selected) + _heading_tokens(selected, heading_costs)
+    while total > budget:
+        optional = sorted(
+            (s for s in selected if not s.required),
+            key=lambda s: s.importance / max(1, s.tokens),
+        )
+        if not optional:
+            break
+        excess = total - budget
+        dropped = set()
+        for section in optional:
+            dropped.add(id(section))
+            excess -= section.tokens
+            if excess <= 0:
+                break
+        selected = [s for s in selected if id(s) not in dropped]
+        total = sum(s.tokens for s in selected) + _heading_tokens(selected, heading_costs)
+
+    text = render_sections(selected)
+    return text, estimate_tokens(text), selected
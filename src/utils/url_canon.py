@@ -0,0 +1,165 @@
+import re
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit, urljoin
+
+CACHE_SIZE = 1 << 16
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+TRACKING_PARAMS = frozenset([
+    'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'twclid', 'igshid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok',
+    'ref_src', 'spm', 'vero_id', 'oly_anon_id', 'oly_enc_id',
+])
+TRACKING_PREFIXES = ('utm_', 'pk_', 'hsa_')
+
+_PERCENT_ESCAPE = re.compile(r'%[0-9A-Fa-f]{2}')
+_MULTIPLE_SLASHES = re.compile(r'/{2,}')
+_UNRESERVED = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~')
+
+
+def _normalize_escape(match):
+    """Decode escapes of unreserved characters and uppercase the rest"""
+    char = chr(int(match.group(0)[1:], 16))
+    if char in _UNRESERVED:
+        return char
+    return match.group(0).upper()
+
+
+def _remove_dot_segments(path):
+    output = []
+    for segment in path.split('/'):
+        if segment == '..':
+            if len(output) > 1:
+                output.pop()
+        elif segment != '.':
+            output.append(segment)
+    if path.endswith(('/.', '/..')):
+        output.append('')
+    return '/'.join(output)
+
+
+def _normalize_host(hostname):
+    """Lowercase ``hostname``, drop a trailing dot, IDNA-encode it and bracket IPv6"""
+    host = (hostname or '').rstrip('.')
+    if ':' in host:
+        return f"[{host}]"
+    try:
+        return host.encode('idna').decode('ascii')
+    except UnicodeError:
+        return host
+
+
+def _is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def _route_fragment(fragment):
+    # Hash-routed single-page apps address distinct pages by fragment
+    return fragment if fragment.startswith(('/', '!')) else ''
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def clean_url(url):
+    """Return ``url`` without tracking parameters or an in-page fragment
+
+    Everything else (path, trailing slash, query order) is kept as written,
+    so the result is safe to link to. Use ``canonicalize_url`` as the key
+    when deduplicating.
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url
+    query = parts.query
+    if query:
+        query = '&'.join(
+            param for param in query.split('&')
+            if param and not _is_tracking_param(param.partition('=')[0])
+        )
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, _route_fragment(parts.fragment)))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def canonicalize_url(url):
+    """Return the canonical form of an absolute URL
+
+    Lowercases scheme and host (IDNA-encoded), drops default ports, tracking
+    parameters and fragments other than ``#/`` and ``#!`` client-side routes,
+    resolves dot segments, normalizes percent-escapes, removes trailing
+    slashes (except the root) and sorts the query string.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url
+
+    scheme = parts.scheme.lower()
+    host = _normalize_host(parts.hostname)
+
+    netloc = host
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{port}"
+    if parts.username is not None:
+        userinfo = parts.username
+        if parts.password is not None:
+            userinfo += ':' + parts.password
+        netloc = f"{userinfo}@{netloc}"
+
+    path = parts.path
+    if '%' in path:
+        path = _PERCENT_ESCAPE.sub(_normalize_escape, path)
+    if '//' in path:
+        path = _MULTIPLE_SLASHES.sub('/', path)
+    if '.' in path:
+        path = _remove_dot_segments(path)
+    path = path.rstrip('/') or '/'
+
+    query = ''
+    if parts.query:
+        # Work on the raw pairs so their original encoding is preserved
+        params = [
+            param for param in parts.query.split('&')
+            if param and not _is_tracking_param(param.partition('=')[0])
+        ]
+        params.sort()
+        query = '&'.join(params)
+
+    return urlunsplit((scheme, netloc, path, query, _route_fragment(parts.fragment)))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def canonical_host(url):
+    """Return the host of ``url`` for same-site comparisons
+
+    Normalized like ``canonicalize_url`` (lowercase, IDNA) and without a
+    leading ``www.`` or default port, so ``https://WWW.Example.com:443/`` and
+    ``http://example.com`` compare equal.
+    """
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return ''
+
+    host = _normalize_host(parts.hostname)
+    if host.startswith('www.'):
+        host = host[4:]
+    if port is not None and port != DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f"{host}:{port}"
+    return host
+
+
+def find_canonical_url(soup, base_url):
+    """Return the ``<link rel=canonical>`` target of a page, if any"""
+    for link in (soup.head or soup).find_all('link', href=True):
+        rel = link.get('rel') or []
+        if isinstance(rel, str):
+            rel = rel.split()
+        if any(value.lower() == 'canonical' for value in rel):
+            href = link.get('href').strip()
+            if href:
+                return clean_url(urljoin(base_url, href))
+    return None
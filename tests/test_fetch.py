@@ -0,0 +1,261 @@
+import time
+import asyncio
+
+import httpx
+import pytest
+import requests
+
+from src.utils import fetch as fetch_module
+from src.utils.fetch import HostHealth, HostUnavailable, async_fetch, fetch
+
+URL = 'https://example.com/page'
+HOST = 'example.com'
+
+
+class FakeResponse:
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Replace the network with a queue of outcomes for ``_timed_get``"""
+    outcomes = []
+    calls = []
+
+    def timed_get(url, headers, timeout):
+        calls.append(timeout)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return FakeResponse(outcome), 0.01
+
+    monkeypatch.setattr(fetch_module, '_timed_get', timed_get)
+    monkeypatch.setattr(fetch_module.time, 'sleep', lambda seconds: None)
+    return outcomes, calls
+
+
+def test_breaker_opens_probes_and_closes(clock, server):
+    outcomes, calls = server
+    health = HostHealth(failure_threshold=2, cooldown=10, clock=clock)
+
+    outcomes.extend([requests.exceptions.ConnectionError('refused')] * 2)
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            fetch(URL, retries=0, hedge=False, health=health)
+
+    with pytest.raises(HostUnavailable):
+        fetch(URL, retries=0, hedge=False, health=health)
+    assert len(calls) == 2
+    assert health.snapshot()[HOST]['circuit'] == 'open'
+
+    # A failed probe reopens the circuit for twice as long
+    clock.now += 10
+    outcomes.append(requests.exceptions.ConnectionError('refused'))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        fetch(URL, retries=0, hedge=False, health=health)
+    clock.now += 10
+    with pytest.raises(HostUnavailable):
+        fetch(URL, retries=0, hedge=False, health=health)
+
+    clock.now += 10
+    outcomes.append(200)
+    assert fetch(URL, retries=0, hedge=False, health=health).status_code == 200
+    assert health.snapshot()[HOST]['circuit'] == 'closed'
+
+    outcomes.append(200)
+    assert fetch(URL, retries=0, hedge=False, health=health).status_code == 200
+
+
+def test_probe_released_on_unexpected_error(clock, server):
+    outcomes, calls = server
+    health = HostHealth(failure_threshold=1, cooldown=10, clock=clock)
+
+    outcomes.append(requests.exceptions.ConnectionError('refused'))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        fetch(URL, retries=0, hedge=False, health=health)
+
+    clock.now += 10
+    outcomes.append(RuntimeError('boom'))
+    with pytest.raises(RuntimeError):
+        fetch(URL, retries=0, hedge=False, health=health)
+
+    # The probe slot is free again rather than stuck
+    outcomes.append(200)
+    assert fetch(URL, retries=0, hedge=False, health=health).status_code == 200
+
+
+def test_server_errors_do_not_open_circuit(clock, server):
+    outcomes, calls = server
+    health = HostHealth(failure_threshold=2, clock=clock)
+
+    outcomes.extend([500] * 4)
+    for _ in range(4):
+        assert fetch(URL, retries=0, hedge=False, health=health).status_code == 500
+    assert health.snapshot()[HOST]['circuit'] == 'closed'
+
+
+def test_timeout_backoff(clock, server):
+    outcomes, calls = server
+    health = HostHealth(min_timeout=0.1, failure_threshold=2, clock=clock)
+    for _ in range(5):
+        health.record_success(HOST, 0.5)
+    learned = health.timeout_for(HOST, 30)
+    assert 0.1 <= learned < 30
+
+    # Timeouts below the caller's limit back off without tripping the breaker
+    outcomes.extend([requests.exceptions.ReadTimeout('slow')] * 3)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        fetch(URL, max_timeout=30, retries=2, hedge=False, health=health)
+    assert calls == pytest.approx([learned, learned * 2, learned * 4])
+    assert health.snapshot()[HOST]['consecutive_failures'] == 0
+    assert health.snapshot()[HOST]['circuit'] == 'closed'
+
+    # A success resets the backoff
+    outcomes.append(200)
+    fetch(URL, max_timeout=30, retries=0, hedge=False, health=health)
+    assert health.snapshot()[HOST]['timeout_backoff'] == 1
+
+
+def test_timeout_floor(clock):
+    health = HostHealth(clock=clock)
+    for _ in range(5):
+        health.record_success(HOST, 0.01)
+    assert health.timeout_for(HOST, 30) == health.min_timeout >= 5
+    assert health.timeout_for(HOST, 2) == 2
+
+
+def test_full_limit_timeouts_open_circuit(clock, server):
+    outcomes, calls = server
+    health = HostHealth(failure_threshold=2, clock=clock)
+
+    # No history: every attempt gets the caller's full limit
+    outcomes.extend([requests.exceptions.ReadTimeout('slow')] * 2)
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            fetch(URL, max_timeout=10, retries=0, hedge=False, health=health)
+    assert calls == [10, 10]
+    with pytest.raises(HostUnavailable):
+        fetch(URL, max_timeout=10, retries=0, hedge=False, health=health)
+
+
+def test_hosts_are_capped(clock):
+    health = HostHealth(failure_threshold=1, max_hosts=3, clock=clock)
+    health.record_failure('down.example', 'refused')
+    for i in range(5):
+        health.record_success(f'host{i}.example', 0.1)
+
+    hosts = health.snapshot()
+    assert len(hosts) == 3
+    # Open circuits are kept; the least recently used closed ones go first
+    assert set(hosts) == {'down.example', 'host3.example', 'host4.example'}
+
+
+def trained_health(clock, **kwargs):
+    """A host with enough fast history to hedge after about 50ms"""
+    health = HostHealth(clock=clock, **kwargs)
+    for _ in range(health.hedge_min_samples):
+        health.record_success(HOST, 0.01)
+    assert health.hedge_delay(HOST) == pytest.approx(0.05, abs=0.02)
+    return health
+
+
+@pytest.fixture
+def slow_server(monkeypatch):
+    """``_timed_get`` that runs the n-th call's behaviour from a list"""
+    behaviours = []
+
+    def timed_get(url, headers, timeout):
+        behaviour = behaviours.pop(0)
+        return behaviour(timeout)
+
+    monkeypatch.setattr(fetch_module, '_timed_get', timed_get)
+    return behaviours
+
+
+def test_hedge_wins_when_first_request_stalls(clock, slow_server):
+    health = trained_health(clock)
+
+    def stall(timeout):
+        time.sleep(1.0)
+        return FakeResponse(200), 1.0
+
+    slow_server.extend([stall, lambda timeout: (FakeResponse(201), 0.01)])
+    started = time.monotonic()
+    response = fetch(URL, max_timeout=5, retries=0, hedge=True, health=health)
+    assert response.status_code == 201
+    assert time.monotonic() - started < 0.5
+    stats = health.snapshot()[HOST]
+    assert (stats['hedges'], stats['hedge_wins']) == (1, 1)
+
+
+def test_hedge_unexpected_error_is_raised(clock, slow_server):
+    health = trained_health(clock, failure_threshold=1, cooldown=10)
+    health.record_failure(HOST, 'refused')
+    clock.now += 10
+
+    def broken(timeout):
+        raise ValueError('bad header')
+
+    slow_server.append(broken)
+    started = time.monotonic()
+    with pytest.raises(ValueError):
+        fetch(URL, max_timeout=5, retries=0, hedge=True, health=health)
+    assert time.monotonic() - started < 1
+
+    # The half-open probe was released
+    slow_server.append(lambda timeout: (FakeResponse(200), 0.01))
+    assert fetch(URL, max_timeout=5, retries=0, hedge=True, health=health).status_code == 200
+
+
+def test_hedge_wait_is_bounded(clock, slow_server):
+    health = trained_health(clock)
+
+    def hang(timeout):
+        time.sleep(3)
+        return FakeResponse(200), 3
+
+    slow_server.extend([hang, hang])
+    started = time.monotonic()
+    with pytest.raises(requests.exceptions.Timeout):
+        fetch(URL, max_timeout=0.5, retries=0, hedge=True, health=health)
+    assert time.monotonic() - started < 1.5
+
+
+def test_async_hedge_cancels_loser(clock):
+    health = trained_health(clock)
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url)
+        if len(calls) == 1:
+            await asyncio.sleep(1.0)
+            return httpx.Response(200, text='slow')
+        return httpx.Response(200, text='fast')
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            started = time.monotonic()
+            response = await async_fetch(client, URL, max_timeout=5, retries=0, hedge=True, health=health)
+            return response, time.monotonic() - started
+
+    response, elapsed = asyncio.run(scenario())
+    assert response.text == 'fast'
+    assert elapsed < 0.5
+    assert len(calls) == 2
+    stats = health.snapshot()[HOST]
+    assert (stats['hedges'], stats['hedge_wins']) == (1, 1)
+
+
+def test_async_hedge_error_without_second_request(clock):
+    health = trained_health(clock)
+
+    async def handler(request):
+        raise httpx.ConnectError('refused', request=request)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            await async_fetch(client, URL, max_timeout=5, retries=0, hedge=True, health=health)
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(scenario())
@@ -0,0 +1,123 @@
+import sqlite3
+
+import pytest
+
+from src.utils.frontier import BloomFilter, CrawlFrontier
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'frontier.db')
+
+
+def test_pop_order(db_path):
+    frontier = CrawlFrontier(db_path, capacity=1000)
+    frontier.push_many([
+        ('https://example.com/deep', 2, 1.0),
+        ('https://example.com/low', 1, 0.2),
+        ('https://example.com/high', 1, 0.9),
+        ('https://example.com/', 0, 0.0),
+        ('https://example.com/tie-first', 1, 0.5),
+        ('https://example.com/tie-second', 1, 0.5),
+    ])
+
+    # Shallowest first, then highest rank, then insertion order
+    assert [url for url, _, _ in frontier.pop(10)] == [
+        'https://example.com/',
+        'https://example.com/high',
+        'https://example.com/tie-first',
+        'https://example.com/tie-second',
+        'https://example.com/low',
+        'https://example.com/deep',
+    ]
+    assert frontier.pop() == []
+    frontier.close()
+
+
+def test_seen_urls_are_not_queued_again(db_path):
+    frontier = CrawlFrontier(db_path, capacity=1000)
+    assert frontier.push_many([('https://example.com/a', 0, 0.0), ('https://example.com/a', 0, 0.0)]) == 1
+    frontier.done(*(url for url, _, _ in frontier.pop()))
+    assert not frontier.push('https://example.com/a')
+    assert 'https://example.com/a' in frontier
+    assert frontier.seen_count == 1
+    frontier.close()
+
+
+def test_push_links_ranks_by_page_order(db_path):
+    class Link:
+        def __init__(self, url):
+            self.url = url
+
+    frontier = CrawlFrontier(db_path, capacity=1000)
+    links = [Link('https://example.com/first'), Link(None), Link('https://example.com/last')]
+    assert frontier.push_links(links, depth=0) == 2
+    assert frontier.pop(2) == [('https://example.com/first', 1, 1.0), ('https://example.com/last', 1, 1 / 3)]
+    frontier.close()
+
+
+def test_unfinished_urls_resume_after_reopen(db_path):
+    frontier = CrawlFrontier(db_path, capacity=1000)
+    frontier.push_many((f'https://example.com/{i}', 0, -i) for i in range(5))
+
+    leased = frontier.pop(3)
+    assert len(frontier) == 2
+    assert frontier.in_progress() == 3
+    frontier.done(leased[0][0])
+    frontier.close()
+
+    # Simulates a crash or restart: the two unfinished leases come back first
+    frontier = CrawlFrontier(db_path, capacity=1000)
+    assert frontier.requeued == 2
+    assert frontier.in_progress() == 0
+    assert len(frontier) == 4
+    assert [url for url, _, _ in frontier.pop(10)] == [f'https://example.com/{i}' for i in range(1, 5)]
+
+    # The seen-set survives too
+    assert 'https://example.com/0' in frontier
+    assert not frontier.push('https://example.com/0')
+    assert frontier.seen_count == 5
+    assert frontier.memory_stats()['in_progress_urls'] == 4
+    frontier.close()
+
+
+def test_reopen_without_close_keeps_leases(db_path):
+    frontier = CrawlFrontier(db_path, capacity=1000)
+    frontier.push_many([('https://example.com/a', 0, 0.0), ('https://example.com/b', 0, 0.0)])
+    frontier.pop(2)
+    # No close(): the process died with both URLs leased
+    frontier.seen.flush()
+
+    reopened = CrawlFrontier(db_path, capacity=1000)
+    assert sorted(url for url, _, _ in reopened.pop(2)) == ['https://example.com/a', 'https://example.com/b']
+    reopened.close()
+
+
+def test_upgrades_frontier_without_lease_column(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE frontier (id INTEGER PRIMARY KEY, url TEXT NOT NULL, depth INTEGER NOT NULL, rank REAL NOT NULL);
+        CREATE INDEX frontier_priority ON frontier (depth, rank DESC, id);
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        INSERT INTO meta VALUES ('capacity', '1000'), ('error_rate', '0.001'), ('seen_count', '1');
+        INSERT INTO frontier (url, depth, rank) VALUES ('https://example.com/old', 0, 0.0);
+    """)
+    conn.commit()
+    conn.close()
+
+    frontier = CrawlFrontier(db_path)
+    assert frontier.pop() == [('https://example.com/old', 0, 0.0)]
+    frontier.close()
+
+
+def test_bloom_filter_sizing_and_membership(tmp_path):
+    bloom = BloomFilter(1000, error_rate=0.01, path=str(tmp_path / 'bits'))
+    assert bloom.add('a')
+    assert not bloom.add('a')
+    assert 'a' in bloom
+    false_positives = sum(f'other-{i}' in bloom for i in range(10_000))
+    assert false_positives < 200
+    bloom.close()
+
+    with pytest.raises(ValueError):
+        BloomFilter(0)
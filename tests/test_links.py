@@ -0,0 +1,43 @@
+import json
+import pickle
+
+import pytest
+
+from src.utils.links import Link, json_default
+
+
+@pytest.mark.parametrize('url', [
+    'https://example.com/docs/guide/intro',
+    'https://example.com/docs/',
+    'https://example.com/search?q=a/b&x=1',
+    'https://example.com',
+    'https://example.com/#/route/page',
+    'mailto:team@example.com',
+])
+def test_url_round_trips(url):
+    assert Link('text', url).url == url
+
+
+def test_prefixes_are_shared():
+    first = Link('a', ''.join(['https://example.com/docs/', 'one']))
+    second = Link('b', ''.join(['https://example.com/docs/', 'two']))
+    assert first._origin is second._origin
+    assert first._prefix is second._prefix
+
+
+def test_json_matches_dicts():
+    links = [Link('Docs', 'https://example.com/docs/', 'All the docs'), Link('API', 'https://example.com/api')]
+    assert json.loads(json.dumps(links, default=json_default)) == [
+        {'text': 'Docs', 'url': 'https://example.com/docs/', 'context': 'All the docs'},
+        {'text': 'API', 'url': 'https://example.com/api'},
+    ]
+    with pytest.raises(TypeError):
+        json.dumps(object(), default=json_default)
+
+
+def test_equality_and_pickle():
+    link = Link('Docs', 'https://example.com/docs/intro', 'context')
+    same = Link('Docs', 'https://example.com/docs/intro', 'context')
+    assert link == same and hash(link) == hash(same)
+    assert link != Link('Docs', 'https://example.com/docs/other', 'context')
+    assert pickle.loads(pickle.dumps(link)) == link
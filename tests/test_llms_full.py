@@ -0,0 +1,103 @@
+import time
+import asyncio
+
+import pytest
+
+from src import asgi
+from src.routes import enhanced_llms_generator as enhanced_module
+from src.routes.enhanced_llms_generator import EnhancedLLMSGenerator, MAX_LINKED_PAGES, parse_llms_full_options
+from src.utils.links import Link
+
+PAGE = b'<html><body><main><p>Linked page text</p></main></body></html>'
+
+
+class FakeResponse:
+    content = PAGE
+
+    def raise_for_status(self):
+        pass
+
+
+def make_generator(count=4):
+    generator = EnhancedLLMSGenerator('https://example.com/')
+    generator.site_data = {
+        'title': 'Example',
+        'categorized_links': {
+            'Documentation': [Link(f'Page {i}', f'https://example.com/docs/{i}') for i in range(count)],
+        },
+    }
+    return generator
+
+
+def test_options_defaults():
+    assert parse_llms_full_options({}) == (32000, 20, True)
+
+
+@pytest.mark.parametrize('value, expected', [
+    (True, True), (False, False), ('false', False), ('False', False), ('0', False), ('no', False),
+    ('true', True), ('1', True), (0, False), (1, True),
+])
+def test_include_pages_is_parsed_strictly(value, expected):
+    assert parse_llms_full_options({'include_pages': value})[2] is expected
+
+
+@pytest.mark.parametrize('data', [
+    {'include_pages': 'maybe'},
+    {'include_pages': None},
+    {'include_pages': 2},
+    {'max_pages': 0},
+    {'max_pages': -3},
+    {'max_pages': MAX_LINKED_PAGES + 1},
+    {'max_pages': 'many'},
+    {'token_budget': 50},
+])
+def test_invalid_options(data):
+    with pytest.raises(ValueError):
+        parse_llms_full_options(data)
+
+
+def test_linked_pages_share_one_budget(monkeypatch):
+    timeouts = []
+
+    def fake_fetch(url, headers=None, max_timeout=30):
+        timeouts.append(max_timeout)
+        if url.endswith(('/2', '/3')):
+            time.sleep(3)
+        return FakeResponse()
+
+    monkeypatch.setattr(enhanced_module, 'fetch', fake_fetch)
+    generator = make_generator()
+    started = time.monotonic()
+    pages = generator._fetch_linked_pages(4, budget=1.5)
+    assert time.monotonic() - started < 2.5
+    assert sorted(link.url for link, _, _ in pages) == ['https://example.com/docs/0', 'https://example.com/docs/1']
+    assert all(timeout <= 1.5 for timeout in timeouts)
+
+
+def test_async_linked_pages_share_one_budget(monkeypatch):
+    timeouts = []
+
+    async def fake_fetch(url, headers, timeout):
+        timeouts.append(timeout)
+        if url.endswith(('/2', '/3')):
+            await asyncio.sleep(3)
+        return PAGE
+
+    monkeypatch.setattr(asgi, '_fetch', fake_fetch)
+    generator = make_generator()
+
+    async def scenario():
+        started = time.monotonic()
+        pages = await asgi._fetch_linked_pages(generator, 4, budget=1.5)
+        return pages, time.monotonic() - started
+
+    pages, elapsed = asyncio.run(scenario())
+    assert elapsed < 2.5
+    assert sorted(link.url for link, _, _ in pages) == ['https://example.com/docs/0', 'https://example.com/docs/1']
+    assert all(timeout <= 1.5 for timeout in timeouts)
+
+
+def test_async_handler_rejects_bad_options():
+    payload, status = asyncio.run(asgi.generate_llms_full({'url': 'example.com', 'max_pages': -1}))
+    assert status == 400
+    assert 'max_pages' in payload['error']
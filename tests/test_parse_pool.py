@@ -0,0 +1,65 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from src.utils import parse_pool as parse_pool_module
+from src.utils.parse_pool import ParsePool, parse_pool
+from src.routes.llms_generator import LLMSGenerator
+from src.routes.enhanced_llms_generator import EnhancedLLMSGenerator
+
+PAGE = b'<html><head><title>T</title></head><body><main><p>Hello</p><a href="/docs">Docs</a></main></body></html>'
+
+
+class BrokenExecutor:
+    def submit(self, *args, **kwargs):
+        future = Future()
+        future.set_exception(BrokenProcessPool('worker died'))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+@pytest.fixture
+def pool_errors(monkeypatch):
+    """Route analyses to the shared pool and make it fail with ``error``"""
+    def install(error):
+        def analyze(generator, method, content):
+            raise error
+
+        monkeypatch.setattr(ParsePool, 'enabled', property(lambda self: True))
+        monkeypatch.setattr(parse_pool, 'analyze', analyze)
+    return install
+
+
+def test_advanced_pool_error_is_reported_as_failed_analysis(pool_errors):
+    pool_errors(OSError(28, 'No space left on device'))
+    generator = EnhancedLLMSGenerator('https://example.com/')
+    assert generator.analyze_website_advanced(PAGE) is False
+    assert generator.analysis_steps[-1].startswith('Error: ')
+
+
+def test_basic_pool_error_is_reported_as_failed_analysis(pool_errors):
+    pool_errors(TypeError('cannot pickle state'))
+    assert LLMSGenerator('https://example.com/').analyze_website(PAGE) is False
+
+
+def test_broken_pool_falls_back_and_backs_off(monkeypatch, capsys):
+    now = [100.0]
+    monkeypatch.setattr(parse_pool_module.time, 'monotonic', lambda: now[0])
+    pool = ParsePool(2, retry_delay=5, max_retry_delay=20)
+
+    for expected_delay in (5, 10, 20, 20):
+        pool._executor = BrokenExecutor()
+        generator = LLMSGenerator('https://example.com/')
+        assert pool.analyze(generator, 'analyze_website', PAGE)
+        assert generator.site_data['title'] == 'T'
+        assert f"parsing in-process for {expected_delay}s" in capsys.readouterr().out
+
+        # No new pool while backing off; analyses run in-process
+        assert not pool.enabled
+        assert pool.analyze(LLMSGenerator('https://example.com/'), 'analyze_website', PAGE)
+        assert pool._executor is None
+        now[0] += expected_delay
+        assert pool.enabled
@@ -0,0 +1,107 @@
+import pytest
+
+from src.utils.refresh_scheduler import RefreshScheduler, estimate_change_rate
+
+HOUR = 3600
+DAY = 86400
+
+
+def make_scheduler(clock, **kwargs):
+    options = dict(fetch_rate=1 / 60, burst=2, min_interval=900, max_interval=7 * DAY,
+                   initial_interval=DAY, clock=clock)
+    options.update(kwargs)
+    return RefreshScheduler(**options)
+
+
+def test_token_bucket_limits_fetches(clock):
+    scheduler = make_scheduler(clock)
+    for i in range(5):
+        scheduler.add(f'https://site{i}.example/')
+
+    assert len(scheduler.pop_due()) == 2
+    assert scheduler.pop_due() == []
+    assert scheduler.seconds_until_next() == pytest.approx(60)
+
+    clock.now += 30
+    assert scheduler.pop_due() == []
+    clock.now += 30
+    assert len(scheduler.pop_due()) == 1
+
+    # Tokens accumulate up to the burst size only
+    clock.now += 10 * 60
+    assert len(scheduler.pop_due()) == 2
+
+
+def test_most_overdue_first(clock):
+    scheduler = make_scheduler(clock, fetch_rate=1.0, burst=10)
+    scheduler.add('https://late.example/', next_visit=clock.now - 3 * HOUR)
+    scheduler.add('https://later.example/', next_visit=clock.now - 5 * HOUR)
+    scheduler.add('https://recent.example/', next_visit=clock.now - 1)
+    scheduler.add('https://future.example/', next_visit=clock.now + HOUR)
+
+    due = scheduler.pop_due()
+    assert [site.url for site in due] == [
+        'https://later.example/', 'https://late.example/', 'https://recent.example/',
+    ]
+    assert scheduler.seconds_until_next() == pytest.approx(HOUR)
+
+
+def test_limit_leaves_rest_queued(clock):
+    scheduler = make_scheduler(clock, fetch_rate=1.0, burst=10)
+    for i in range(3):
+        scheduler.add(f'https://site{i}.example/', next_visit=clock.now - i)
+
+    assert [site.url for site in scheduler.pop_due(limit=1)] == ['https://site2.example/']
+    assert len(scheduler.pop_due()) == 2
+
+
+def test_rescheduled_site_is_not_popped_twice(clock):
+    scheduler = make_scheduler(clock, fetch_rate=1.0, burst=10)
+    site = scheduler.add('https://example.com/')
+    assert scheduler.pop_due() == [site]
+
+    scheduler.record(site, 'content', 'links')
+    assert site.next_visit == pytest.approx(clock.now + site.interval)
+    assert scheduler.pop_due() == []
+
+    clock.now = site.next_visit
+    assert scheduler.pop_due() == [site]
+
+
+def test_failure_backoff(clock):
+    scheduler = make_scheduler(clock, min_interval=900, max_interval=4 * HOUR)
+    site = scheduler.add('https://down.example/')
+    scheduler.pop_due()
+
+    delays = []
+    for _ in range(6):
+        scheduler.record_failure(site)
+        delays.append(site.next_visit - clock.now)
+    assert delays == [900, 1800, 3600, 7200, 4 * HOUR, 4 * HOUR]
+
+    # A successful visit clears the failure count
+    scheduler.record(site, 'content', 'links')
+    assert site.failures == 0
+
+
+def test_changing_sites_are_visited_more_often(clock):
+    scheduler = make_scheduler(clock, fetch_rate=10 / DAY, burst=10)
+    busy = scheduler.add('https://busy.example/')
+    quiet = scheduler.add('https://quiet.example/')
+    scheduler.pop_due()
+
+    for visit in range(20):
+        scheduler.record(busy, f'content-{visit}', 'links')
+        scheduler.record(quiet, 'content', 'links')
+        clock.now += 6 * HOUR
+
+    assert busy.interval < quiet.interval
+    assert scheduler.planned_fetch_rate() <= scheduler.fetch_rate * 1.01
+
+
+def test_estimate_change_rate():
+    assert estimate_change_rate(0, 0, 0) is None
+    assert estimate_change_rate(10, 0, 10 * DAY) == 0.0
+    # Changes seen on every visit still give a finite estimate
+    assert 0 < estimate_change_rate(10, 10, 10 * DAY) < float('inf')
+    assert estimate_change_rate(10, 2, 10 * DAY) < estimate_change_rate(10, 8, 10 * DAY)
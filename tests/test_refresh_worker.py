@@ -0,0 +1,99 @@
+import pytest
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+
+from src.models.user import db
+from src.models.tracked_site import TrackedSite
+from src.routes.refresh import RefreshWorker
+from src.utils.refresh_scheduler import RefreshScheduler
+
+URLS = ['https://one.example/', 'https://two.example/']
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        for url in URLS:
+            db.session.add(TrackedSite(url=url, mode='basic'))
+        db.session.commit()
+    return app
+
+
+def make_worker(app, clock, regenerate):
+    scheduler = RefreshScheduler(fetch_rate=1.0, burst=10, min_interval=900, clock=clock)
+    worker = RefreshWorker(app, scheduler, regenerate=regenerate)
+    worker.sync()
+    return worker
+
+
+def regenerated(url, mode):
+    return {'title': url, 'description': 'd'}, f'# {url}'
+
+
+def test_refresh_records_visit(app, clock):
+    worker = make_worker(app, clock, regenerated)
+    assert worker.run_pending() == 2
+    assert worker.refreshed == 2
+    with app.app_context():
+        rows = TrackedSite.query.order_by(TrackedSite.url).all()
+        assert [row.llms_txt for row in rows] == [f'# {url}' for url in URLS]
+        assert all(row.visits == 1 and row.next_visit > clock.now for row in rows)
+
+
+def test_regenerate_error_backs_off(app, clock):
+    def broken(url, mode):
+        raise RuntimeError('site is down')
+
+    worker = make_worker(app, clock, broken)
+    worker.run_pending()
+    assert worker.failed == 2
+    for url in URLS:
+        site = worker.scheduler.get(url, 'basic')
+        assert site.failures == 1
+        assert site.next_visit == clock.now + 900
+    with app.app_context():
+        assert TrackedSite.query.first().last_error == 'site is down'
+
+
+def test_failed_commit_is_rolled_back_and_rescheduled(app, clock, monkeypatch):
+    commit = db.session.commit
+    calls = []
+
+    def flaky_commit():
+        calls.append(1)
+        if len(calls) == 1:
+            raise OperationalError('COMMIT', {}, Exception('database is locked'))
+        return commit()
+
+    worker = make_worker(app, clock, regenerated)
+    monkeypatch.setattr(db.session, 'commit', flaky_commit)
+    assert worker.run_pending() == 2
+
+    # Both sites are back on the queue, and the second one was still saved
+    for url in URLS:
+        assert worker.scheduler.get(url, 'basic').next_visit is not None
+    assert worker.scheduler.seconds_until_next() is not None
+    with app.app_context():
+        saved = {row.url: row.llms_txt for row in TrackedSite.query.all()}
+    assert list(saved.values()).count(None) == 1
+
+    # The failed site comes round again and is refreshed normally
+    clock.now += 7 * 86400
+    assert worker.run_pending() == 2
+    with app.app_context():
+        assert all(row.llms_txt for row in TrackedSite.query.all())
+
+
+def test_deleted_site_is_dropped(app, clock):
+    worker = make_worker(app, clock, regenerated)
+    with app.app_context():
+        TrackedSite.query.filter_by(url=URLS[0]).delete()
+        db.session.commit()
+    worker.run_pending()
+    assert worker.scheduler.get(URLS[0], 'basic') is None
+    assert worker.scheduler.get(URLS[1], 'basic').next_visit is not None
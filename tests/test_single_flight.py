@@ -0,0 +1,199 @@
+import os
+import time
+import asyncio
+import threading
+import multiprocessing
+
+import pytest
+
+from src.utils import single_flight as single_flight_module
+from src.utils.single_flight import AsyncSingleFlight, SingleFlight, coalesce_key
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for condition"
+        time.sleep(0.005)
+
+
+def run_coalesced(flight, fn, followers=3):
+    """Start a leader running ``fn`` and ``followers`` callers for the same key
+
+    ``fn`` receives an event to block on; it is set once every follower is
+    waiting. Returns the ``(ok, value)`` outcome of each caller.
+    """
+    release = threading.Event()
+    outcomes = []
+    lock = threading.Lock()
+
+    def call():
+        try:
+            result = (True, flight.do('key', lambda: fn(release)))
+        except Exception as e:
+            result = (False, e)
+        with lock:
+            outcomes.append(result)
+
+    threads = [threading.Thread(target=call)]
+    threads[0].start()
+    wait_for(lambda: flight.stats()['in_flight'] == 1)
+    for _ in range(followers):
+        threads.append(threading.Thread(target=call))
+        threads[-1].start()
+    wait_for(lambda: flight.stats()['waiting'] == followers)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_followers_share_leader_result():
+    flight = SingleFlight()
+    calls = []
+
+    def analyze(release):
+        calls.append(1)
+        release.wait(5)
+        return object()
+
+    outcomes = run_coalesced(flight, analyze)
+    assert len(calls) == 1
+    assert len(outcomes) == 4
+    assert all(ok for ok, _ in outcomes)
+    assert len({id(value) for _, value in outcomes}) == 1
+
+    stats = flight.stats()
+    assert stats['executed'] == 1
+    assert stats['coalesced'] == 3
+    assert stats['errors'] == 0
+    assert stats['in_flight'] == 0
+    assert stats['waiting'] == 0
+
+
+def test_error_reaches_every_waiter():
+    flight = SingleFlight()
+    error = ValueError('site is down')
+
+    def analyze(release):
+        release.wait(5)
+        raise error
+
+    outcomes = run_coalesced(flight, analyze, followers=2)
+    assert outcomes == [(False, error)] * 3
+    assert flight.stats()['errors'] == 1
+
+    # A failed key is not remembered; the next call runs again
+    assert flight.do('key', lambda: 'fresh') == 'fresh'
+    assert flight.stats()['executed'] == 2
+
+
+def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.do('key', lambda: 2) == 2
+    assert flight.do('other', lambda: 3) == 3
+    assert flight.stats()['executed'] == 3
+    assert flight.stats()['coalesced'] == 0
+
+
+def test_coalesce_key_uses_canonical_url():
+    assert coalesce_key('https://Example.com:443/docs/?utm_source=x', 'basic') == \
+        coalesce_key('https://example.com/docs', 'basic')
+    assert coalesce_key('https://example.com/', 'basic') != coalesce_key('https://example.com/', 'advanced')
+
+
+def _worker(lock_dir, started, delay, fail, results):
+    flight = SingleFlight(lock_dir=lock_dir)
+
+    def analyze():
+        started.set()
+        time.sleep(delay)
+        if fail:
+            raise ValueError(f'failed in {os.getpid()}')
+        return os.getpid()
+
+    try:
+        outcome = (True, flight.do('key', analyze))
+    except ValueError as e:
+        outcome = (False, str(e))
+    results.put((os.getpid(), outcome, flight.stats()))
+
+
+@pytest.mark.skipif(single_flight_module.fcntl is None or 'fork' not in multiprocessing.get_all_start_methods(),
+                    reason="needs fcntl and fork")
+@pytest.mark.parametrize('fail', [False, True])
+def test_result_handed_over_between_processes(tmp_path, fail):
+    context = multiprocessing.get_context('fork')
+    lock_dir = str(tmp_path / 'locks')
+    results = context.Queue()
+
+    leader_started = context.Event()
+    leader = context.Process(target=_worker, args=(lock_dir, leader_started, 1.0, fail, results))
+    leader.start()
+    assert leader_started.wait(10)
+
+    followers = [
+        context.Process(target=_worker, args=(lock_dir, context.Event(), 0.0, fail, results))
+        for _ in range(2)
+    ]
+    for process in followers:
+        process.start()
+
+    reports = {}
+    for _ in range(3):
+        pid, outcome, stats = results.get(timeout=20)
+        reports[pid] = (outcome, stats)
+    for process in [leader] + followers:
+        process.join(5)
+
+    leader_outcome, leader_stats = reports.pop(leader.pid)
+    assert leader_stats['executed'] == 1
+    if fail:
+        assert leader_outcome == (False, f'failed in {leader.pid}')
+    else:
+        assert leader_outcome == (True, leader.pid)
+    for outcome, stats in reports.values():
+        assert outcome == leader_outcome
+        assert stats['executed'] == 0
+        assert stats['coalesced_across_workers'] == 1
+    assert oct(os.stat(lock_dir).st_mode & 0o777) == oct(0o700)
+
+
+def test_stale_result_is_not_reused(tmp_path):
+    if single_flight_module.fcntl is None:
+        pytest.skip("needs fcntl")
+    flight = SingleFlight(lock_dir=str(tmp_path), result_ttl=30)
+    assert flight.do('key', lambda: 'first') == 'first'
+    # Results finished before a request was made are never handed out
+    assert flight.do('key', lambda: 'second') == 'second'
+    assert flight.stats()['coalesced_across_workers'] == 0
+
+
+def test_async_followers_share_result_and_survive_leader_cancel():
+    async def scenario():
+        flight = AsyncSingleFlight()
+        release = asyncio.Event()
+        runs = []
+
+        async def analyze():
+            runs.append(1)
+            await release.wait()
+            return 'result'
+
+        leader = asyncio.create_task(flight.do('key', analyze))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(flight.do('key', analyze)) for _ in range(2)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        values = await asyncio.gather(*followers)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return runs, values, flight.stats()
+
+    runs, values, stats = asyncio.run(scenario())
+    assert runs == [1]
+    assert values == ['result', 'result']
+    assert stats == {'executed': 1, 'coalesced': 2, 'errors': 0, 'in_flight': 0}
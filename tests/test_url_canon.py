@@ -0,0 +1,111 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from src.utils.url_canon import canonical_host, canonicalize_url, clean_url, find_canonical_url
+from src.routes.llms_generator import LLMSGenerator
+from src.routes.enhanced_llms_generator import EnhancedLLMSGenerator
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('HTTPS://Example.COM/Docs', 'https://example.com/Docs'),
+    ('https://example.com:443/a', 'https://example.com/a'),
+    ('http://example.com:80/a', 'http://example.com/a'),
+    ('https://example.com:8443/a', 'https://example.com:8443/a'),
+    ('https://example.com./a', 'https://example.com/a'),
+    ('https://bücher.de/katalog', 'https://xn--bcher-kva.de/katalog'),
+    ('http://[::1]:8080/a', 'http://[::1]:8080/a'),
+    ('https://user:pw@example.com/a', 'https://user:pw@example.com/a'),
+])
+def test_host_and_port(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://example.com/a/./b/../c', 'https://example.com/a/c'),
+    ('https://example.com/../a', 'https://example.com/a'),
+    ('https://example.com/a/b/..', 'https://example.com/a'),
+    ('https://example.com//a///b/', 'https://example.com/a/b'),
+    ('https://example.com', 'https://example.com/'),
+    ('https://example.com/%7euser/%2f', 'https://example.com/~user/%2F'),
+])
+def test_path_normalization(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+def test_tracking_params_and_query_order():
+    assert canonicalize_url('https://example.com/a?utm_source=x&b=2&gclid=1&a=1&UTM_Medium=y') == \
+        'https://example.com/a?a=1&b=2'
+    assert canonicalize_url('https://example.com/a?utm_campaign=x') == 'https://example.com/a'
+
+
+def test_fragments():
+    assert canonicalize_url('https://example.com/page#section') == 'https://example.com/page'
+    # Hash routes address distinct pages of a single-page app
+    assert canonicalize_url('https://example.com/#/docs') == 'https://example.com/#/docs'
+    assert canonicalize_url('https://example.com/#!/api') == 'https://example.com/#!/api'
+    assert canonicalize_url('https://example.com/#/docs') != canonicalize_url('https://example.com/#/api')
+
+
+def test_invalid_url_is_returned_unchanged():
+    assert canonicalize_url('http://example.com:notaport/') == 'http://example.com:notaport/'
+    assert canonical_host('http://example.com:notaport/') == ''
+
+
+def test_clean_url_keeps_url_as_written():
+    assert clean_url('https://x.com/docs/') == 'https://x.com/docs/'
+    # Repeated keys keep their order, only tracking params go
+    assert clean_url('https://x.com/s?a=2&utm_source=n&a=1') == 'https://x.com/s?a=2&a=1'
+    assert clean_url('https://x.com/a#top') == 'https://x.com/a'
+    assert clean_url('https://x.com/#/docs') == 'https://x.com/#/docs'
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.example.com/',
+    'https://EXAMPLE.com:443/x',
+    'http://example.com',
+    'http://example.com.:80/',
+])
+def test_canonical_host_ignores_www_and_default_port(url):
+    assert canonical_host(url) == 'example.com'
+
+
+def test_canonical_host_keeps_other_ports_and_subdomains():
+    assert canonical_host('https://example.com:8443/') == 'example.com:8443'
+    assert canonical_host('https://docs.example.com/') == 'docs.example.com'
+    assert canonical_host('https://bücher.de/') == 'xn--bcher-kva.de'
+
+
+def test_find_canonical_url():
+    soup = BeautifulSoup('<html><head><link rel="canonical" href="/docs/?utm_source=x"></head></html>',
+                         'html.parser')
+    assert find_canonical_url(soup, 'https://example.com/page') == 'https://example.com/docs/'
+    assert find_canonical_url(BeautifulSoup('<p>no head</p>', 'html.parser'), 'https://example.com/') is None
+
+
+@pytest.mark.parametrize('cls', [LLMSGenerator, EnhancedLLMSGenerator])
+def test_is_internal_link(cls):
+    generator = cls('https://www.example.com/')
+    assert generator._is_internal_link('https://example.com/docs')
+    assert generator._is_internal_link('http://WWW.example.com:80/docs')
+    assert generator._is_internal_link('https://example.com:443/')
+    assert not generator._is_internal_link('https://example.com:8443/')
+    assert not generator._is_internal_link('https://docs.example.com/')
+    assert not generator._is_internal_link('mailto:team@example.com')
+    assert not generator._is_internal_link('https://other.com/')
+
+
+def test_generators_output_links_as_written():
+    html = b'''<html><head><title>T</title></head><body>
+    <nav><a href="/docs/">Docs</a><a href="/docs">Docs again</a></nav>
+    <main><a href="/search?a=2&a=1&utm_source=x">Search API reference</a></main>
+    </body></html>'''
+    generator = EnhancedLLMSGenerator('https://example.com/')
+    assert generator.analyze_website_advanced(html)
+    urls = [link.url for links in generator.site_data['categorized_links'].values() for link in links]
+    assert 'https://example.com/docs/' in urls
+    assert 'https://example.com/docs' not in urls
+    assert 'https://example.com/search?a=2&a=1' in urls
+
+    generator = LLMSGenerator('https://example.com/')
+    assert generator.analyze_website(html)
+    assert [link.url for link in generator.site_data['links']['Navigation']] == ['https://example.com/docs/']